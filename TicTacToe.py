@@ -1,12 +1,11 @@
+import os
 import numpy as np
 from copy import copy
+from game import OmokGame, VARIANTS, win_lines
 
-# Set the dimensions of the Tic-Tac-Toe board
-rows = 3
-cols = 3
-
-# Initialize the game board as a 3x3 array filled with zeros
-board = np.zeros((rows, cols))
+# Set the dimensions of the Tic-Tac-Toe board and the number in a row that wins
+rows, winLength = VARIANTS['tictactoe']
+cols = rows
 
 # Define the mapping of values on the board
 # 0 -> blank
@@ -17,27 +16,21 @@ board = np.zeros((rows, cols))
 inf = 9999999999
 neg_inf = -9999999999
 
-def printBoard():
+def printBoard(board, marks=('_', 'X', 'O')):
     # Iterate over each row and column in the board
     for i in range(0, rows):
         for j in range(0, cols):
             # Print the corresponding symbol based on the value in the board
-            if board[i, j] == 0:
-                print(' _ ', end='')
-
-            elif board[i, j] == 1:
-                print(' X ', end='')
-
-            else:
-                print(' O ', end='')
+            print(f' {marks[int(board[i, j])]} ', end='')
 
         # Move to the next line to print the next row
         print()
 # Initialize the heuristic table to evaluate board positions for each winning position
 heuristicTable = np.zeros((rows + 1, cols + 1))
 
-# Calculate the number of winning positions
-numberOfWinningPositions = rows + cols + 2
+# The winning positions are the engine's precomputed win lines for this board, as flat cell indices
+winningArray = win_lines(rows, winLength)
+numberOfWinningPositions = len(winningArray)
 
 # Populate the heuristic table with values for each position
 # The index represents the number of X's or O's in a winning position
@@ -45,34 +38,108 @@ for index in range(0, rows + 1):
     heuristicTable[index, 0] = 10 ** index  # Positive value for X's
     heuristicTable[0, index] = -10 ** index  # Negative value for O's
 
-# Define the array of winning positions
-winningArray = np.array([[0, 1, 2], [3, 4, 5], [6, 7, 8], [0, 3, 6], [1, 4, 7], [2, 5, 8], [0, 4, 8], [2, 4, 6]])
-
 def utilityOfState(state):
-    # Create a copy of the flattened state array
-    stateCopy = copy(state.ravel())
-
-    # Initialize the heuristic value
-    heuristic = 0
-
-    # Iterate over each winning position
-    for i in range(0, numberOfWinningPositions):
-        maxp = 0
-        minp = 0
-
-        # Check the cells in the current winning position
-        for j in range(0, rows):
-            # Count the number of 'O's (maxp) and 'X's (minp) in the winning position
-            if stateCopy[winningArray[i, j]] == 2:
-                maxp += 1
-            elif stateCopy[winningArray[i, j]] == 1:
-                minp += 1
-
-        # Calculate the heuristic value for the current winning position
-        heuristic += heuristicTable[maxp][minp]
-
-    # Return the accumulated heuristic value for the state
-    return heuristic
+    # Gather the cells of every winning position at once, one row per position
+    lines = np.asarray(state).ravel()[winningArray]
+
+    # Count the number of 'O's (maxp) and 'X's (minp) in each winning position
+    maxp = (lines == 2).sum(axis=1)
+    minp = (lines == 1).sum(axis=1)
+
+    # Return the sum of the heuristic values of all winning positions
+    return heuristicTable[maxp, minp].sum()
+
+# Perfect-play table: every position is encoded as a base-3 int (cell i is digit i, 0 blank,
+# 1 'X', 2 'O'), with 'X' as the side that moved first. For each reachable position the table
+# holds the value for the side to move (positive wins, negative loses, larger when the game ends
+# sooner, 0 draws) and the best cell 0-8 (-1 when the game is over or the position unreachable)
+numberOfStates = 3 ** (rows * cols)
+powersOfThree = 3 ** np.arange(rows * cols)
+tablePath = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tictactoe_table.npy')
+perfectTable = None
+
+def encodeState(state):
+    return int(np.asarray(state).ravel().astype(np.int64) @ powersOfThree)
+
+def decodeState(code):
+    return [(code // 3 ** i) % 3 for i in range(rows * cols)]
+
+# Retrograde solver: enumerates the reachable positions layer by layer from the empty board, then
+# scores them from the full boards back to the empty one so every child is solved before its parent
+def solveTable():
+    values = np.zeros(numberOfStates, dtype=np.int8)
+    moves = np.full(numberOfStates, -1, dtype=np.int8)
+    cells = rows * cols
+    layers = [[0]]
+    over = set()
+    for stones in range(cells):
+        nextLayer = set()
+        mover = 1 if stones % 2 == 0 else 2
+        for code in layers[stones]:
+            if code in over:
+                continue
+            digits = decodeState(code)
+            for i in range(cells):
+                if digits[i] == 0:
+                    child = code + mover * 3 ** i
+                    nextLayer.add(child)
+                    # A three in a row through the new stone ends the game
+                    digits[i] = mover
+                    if any(all(digits[j] == mover for j in line) for line in winningArray if i in line):
+                        over.add(child)
+                    digits[i] = 0
+        layers.append(sorted(nextLayer))
+
+    for stones in range(cells, -1, -1):
+        mover = 1 if stones % 2 == 0 else 2
+        for code in layers[stones]:
+            if code in over:
+                # The previous move won, so the side to move has lost
+                values[code] = -(cells + 1 - stones)
+                continue
+            digits = decodeState(code)
+            best, bestMove = None, -1
+            for i in range(cells):
+                if digits[i] == 0:
+                    value = -int(values[code + mover * 3 ** i])
+                    if best is None or value > best:
+                        best, bestMove = value, i
+            values[code] = 0 if best is None else best
+            moves[code] = bestMove
+    return np.stack([values, moves])
+
+# Writes the table as a single (2, 3**9) int8 array, about 39 KB
+def saveTable(path=tablePath):
+    np.save(path, solveTable())
+
+# Memory-maps a saved table, or solves it in memory when there is no file
+def loadTable(path=tablePath):
+    global perfectTable
+    if perfectTable is None:
+        perfectTable = np.load(path, mmap_mode='r') if path and os.path.exists(path) else solveTable()
+    return perfectTable
+
+# Returns the perfect (row, col) for player with a single table lookup, or None when the game is over
+def perfectCell(state, player):
+    table = loadTable()
+    flat = np.asarray(state).ravel()
+    opponent = 3 - player
+    # The table assumes 'X' moved first, so colours are swapped when player is second to move as 'X'
+    # or first to move as 'O'
+    first = (flat == player).sum() == (flat == opponent).sum()
+    code = flat.astype(np.int64)
+    if (player == 1) != first:
+        code = np.where(code == 0, 0, 3 - code)
+    cell = int(table[1, int(code @ powersOfThree)])
+    return (cell // cols, cell % cols) if cell >= 0 else None
+
+# Plays the perfect move for player on a copy of state
+def perfectMove(state, player):
+    nextState = np.array(state, copy=True)
+    cell = perfectCell(state, player)
+    if cell is not None:
+        nextState[cell] = player
+    return nextState
 def minimax(state, alpha, beta, maximizing, depth, maxp, minp):
     # Base case: if depth reaches 0, return the utility of the current state
     if depth == 0:
@@ -137,101 +204,68 @@ def minimax(state, alpha, beta, maximizing, depth, maxp, minp):
                 break
 
         return utility, returnState
-def checkGameOver(state):
-    # Create a copy of the state to avoid modifying the original state
-    stateCopy = copy(state)
-
-    # Calculate the utility value of the state using the utilityOfState function
-    value = utilityOfState(stateCopy)
-
-    # If the value is greater than or equal to 1000, it indicates a win for the current player
-    if value >= 1000:
-        return 1  # Return 1 to indicate a win
-
-    # If the value is not greater than 1000, it indicates the game is not over or it's a draw
-    return -1  # Return -1 to indicate the game is not over or it's a draw
-def isMoveValid(row, col):
+def isMoveValid(game, row, col):
     # Check if the given row and column are within the valid range of the board
     if row < 0 or row >= rows or col < 0 or col >= cols:
         return False
 
     # Check if the cell at the given row and column is already occupied
-    if board[row, col] != 0:
+    if game.board[row, col] != 0:
         return False
 
     # Return True if the move is valid (within range and not occupied), False otherwise
     return True
+
+# Every game gets its own board from the shared m,n,k engine, so games don't share any state
+def newGame():
+    return OmokGame(rows, win_length=winLength)
+
 def HumanagainstAI():
     num = int(input('Enter player num (1st or 2nd): '))
-    value = 0
-    global board
-    for turn in range(0, rows * cols):
-        if (turn + num) % 2 == 1:  # Make the player go first, and assign 'X' to the human player
+    game = newGame()
+    # The engine numbers stones by move order, so the human's stones are drawn as 'X' either way
+    human = 1 if num == 1 else 2
+    marks = ('_', 'X', 'O') if human == 1 else ('_', 'O', 'X')
+    while not game.is_terminal():
+        if game.current_player == human:
             print('Your turn')
             validMove = False
             while not validMove:
                 try:
                     r, c = [int(x) for x in input('Enter your move (row column): ').split(' ')]
-                except:
+                    validMove = isMoveValid(game, r - 1, c - 1)  # Check if the move is valid
+                except ValueError:
                     validMove = False
-                if isMoveValid(r - 1, c - 1):  # Check if the move is valid
-                    board[r - 1, c - 1] = 1  # Assign 'X' to the chosen cell
-                    validMove = True
-                else:
+                if not validMove:
                     print('Invalid move! Try again.')
-
-            printBoard()  # Print the updated board
-            value = checkGameOver(board)  # Check if the game is over
-            if value == 1:
-                print('You win. Game Over')
-                board = np.zeros((rows, cols))  # Reset the board
-                return
-            print('\n')
-        else:  # It's the computer's turn, make the AI always put a circle ('O')
+            game.make_move(r - 1, c - 1)
+        else:  # It's the computer's turn
             print('AI turn')
-            state = np.copy(board)
-            value, nextState = minimax(state, neg_inf, inf, True, 2, 2, 1)  # Use minimax algorithm to choose the AI's move
-            board = np.copy(nextState)
-            printBoard()
-            print('\n')
-            value = checkGameOver(board)
-            if value == 1:
-                print('PC wins. Game Over')
-                board = np.zeros((rows, cols))
-                return
-    board = np.zeros((rows, cols))
-    print('It\'s a draw')
+            game.make_move(*perfectCell(game.board, game.current_player))  # Look up the perfect move in the solved table
+        printBoard(game.board, marks)  # Print the updated board
+        print('\n')
+
+    if game.winner == human:
+        print('You win. Game Over')
+    elif game.winner is not None:
+        print('PC wins. Game Over')
+    else:
+        print('It\'s a draw')
 
 def AIagainstAI():
-    value = 0
-    global board
-    for turn in range(0, rows * cols):
-        if turn % 2 == 0:  # AI 1's turn
-            print('AI1 turn')
-            state = np.copy(board)
-            value, nextState = minimax(state, neg_inf, inf, True, 2, 2, 2)  # Use minimax algorithm to choose AI 1's move
-            board = np.copy(nextState)
-            printBoard()
-            print('\n')
-            value = checkGameOver(board)
-            if value == 1:
-                print('AI 1 wins. Game Over')
-                board = np.zeros((rows, cols))
-                return
-        else:  # AI 2's turn
-            print('AI2 turn')
-            state = np.copy(board)
-            value, nextState = minimax(state, neg_inf, inf, False, 2, 2, 1)  # Use minimax algorithm to choose AI 2's move
-            board = np.copy(nextState)
-            printBoard()
-            print('\n')
-            value = checkGameOver(board)
-            if value == 1:
-                print('AI 2 wins. Game Over')
-                board = np.zeros((rows, cols))
-                return
-    board = np.zeros((rows, cols))
-    print('It\'s a draw')
+    game = newGame()
+    # AI 1 moves first and plays 'O'
+    marks = ('_', 'O', 'X')
+    while not game.is_terminal():
+        print(f'AI{game.current_player} turn')
+        game.make_move(*perfectCell(game.board, game.current_player))  # Look up the perfect move in the solved table
+        printBoard(game.board, marks)
+        print('\n')
+
+    if game.winner is not None:
+        print(f'AI {game.winner} wins. Game Over')
+    else:
+        print('It\'s a draw')
 
 # This is what I added
 def main():
@@ -240,21 +274,25 @@ def main():
         print("\nChoose a game mode:")
         print("1. Human vs AI")
         print("2. AI vs AI")
-        print("3. Exit")
+        print("3. Save perfect-play table")
+        print("4. Exit")
         
-        choice = input("Enter your choice (1-3): ")
+        choice = input("Enter your choice (1-4): ")
         
         if choice == '1':
             print("\nStarting Human vs AI game...")
-            printBoard()
+            printBoard(np.zeros((rows, cols)))
             print()
             HumanagainstAI()
         elif choice == '2':
             print("\nStarting AI vs AI game...")
-            printBoard()
+            printBoard(np.zeros((rows, cols)))
             print()
             AIagainstAI()
         elif choice == '3':
+            saveTable()
+            print(f"Saved the perfect-play table to {tablePath}")
+        elif choice == '4':
             print("Goodbye!")
             break
         else:
@@ -1,196 +1,758 @@
+import multiprocessing
+import threading
 import time
 from copy import deepcopy
 from collections import defaultdict
-from game import OmokGame  # if you use it inside
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from game import OmokGame, transform_cell, inverse_symmetry  # if you use it inside
+from book import OpeningBook, DEFAULT_BOOK_PATH
+from evaluation import (PATTERNS, DEFAULT_WEIGHTS_PATH, IncrementalEvaluator, default_patterns, load_weights,
+                        move_weights, pattern_table, vectorized_score, batch_move_scores, batch_child_scores)
+from stats import SearchStats
+from threats import ThreatSearch, five_cells_through, open_four_cells, line_cells, four_moves
+from timeman import TimeManager
+from transposition import TranspositionTable, EvaluationCache, EXACT, LOWER, UPPER
+
+# stop event of the OmokAI that owns the worker pool, handed to each worker process when it starts
+worker_stop_event = None
+
+def init_worker(stop_event):
+    global worker_stop_event
+    worker_stop_event = stop_event
+
+# runs in a worker process: iterative deepening over a share of the root moves, on the parent's deadlines
+# and stopped with the parent's search
+def root_search_worker(player, options, size, backend, win_length, move_history, root_moves, start_time, budget):
+    game = OmokGame(size, backend=backend, win_length=win_length)
+    for move in move_history:
+        game.make_move(*move)
+    ai = OmokAI(player, **options)
+    ai.use_win_length(win_length)
+    if worker_stop_event is not None:
+        ai.time_manager.stop_event = worker_stop_event
+    ai.time_manager.start(game, start_time, budget)
+    results = ai.deepen(game, root_moves)
+    return results, ai.nodes
+
+# half-width of the first aspiration window around the score two iterations back
+ASPIRATION_WINDOW = 20000
+
+# late move reductions: moves ranked from LMR_MOVES on are searched one ply shallower at depth
+# LMR_DEPTH or more, and two plies shallower from LMR_DEEP_MOVES on, unless the move is tactical
+LMR_DEPTH = 3
+LMR_MOVES = 3
+LMR_DEEP_MOVES = 10
+# null-move pruning: extra depth reduction of the null move search, and the smallest depth it is tried at
+NULL_REDUCTION = 2
+NULL_MIN_DEPTH = 3
+# quiescence: nodes allowed below one horizon node, and the deepest extension
+QUIESCENCE_NODES = 32
+QUIESCENCE_MAX_PLY = 8
+# children scored in the first batch at a frontier node; each later batch is four times larger
+FRONTIER_BATCH = 2
+# share of the time manager's soft budget the threat-space search may use before alpha-beta starts
+THREAT_SHARE = 0.5
 
 class OmokAI:
     # sets the AI player, time limit for moves and initializes helper structures
-    def __init__(self, player, time_limit=10):
+    # tt_size_mb and eval_cache_mb cap the memory of the transposition table and heuristic cache
+    # evaluation picks the backend: 'incremental' (per-line scores updated on each move),
+    # 'vectorized' (batched NumPy scan of the whole board) or 'loop' (full rescan in Python)
+    # workers > 1 splits the root moves over a process pool
+    # threat_search runs the VCF/VCT solver before alpha-beta
+    # book_path is an opening book file written by build_book.py (None for no book)
+    # weights_path is a pattern weights file written by tuning.py (None for the built-in PATTERNS)
+    # symmetry shares table entries between rotated and reflected copies of a position
+    # max_depth stops iterative deepening at a fixed depth even if time is left
+    # profile times evaluate, order_moves and get_possible_moves into the search stats
+    # clock and increment give the AI a game clock in seconds instead of a flat time_limit per move
+    # lmr and null_move turn on late move reductions and null-move pruning
+    # quiescence extends fours, forced blocks and open threes past the depth limit
+    def __init__(self, player, time_limit=10, tt_size_mb=32, eval_cache_mb=8, evaluation='incremental',
+                 workers=1, threat_search=True, book_path=DEFAULT_BOOK_PATH, symmetry=True, max_depth=None,
+                 profile=False, clock=None, increment=0.0, lmr=True, null_move=True, quiescence=True,
+                 weights_path=DEFAULT_WEIGHTS_PATH):
         self.player = player
+        self.lmr = lmr
+        self.null_move = null_move
+        self.quiescence = quiescence
+        self.quiescence_budget = 0
         self.time_limit = time_limit
-        self.heuristic_cache = {}
-        self.transposition_table = {}
+        self.time_manager = TimeManager(time_limit, clock, increment)
+        # the worker processes of parallel_search read the stop request, so it must be shared with them
+        if workers > 1:
+            self.time_manager.stop_event = multiprocessing.Event()
+        self.max_depth = max_depth
+        self.tt_size_mb = tt_size_mb
+        self.eval_cache_mb = eval_cache_mb
+        self.evaluation = evaluation
+        self.symmetry = symmetry
+        self.workers = workers
+        self.executor = None
+        self.threat_search = ThreatSearch(time_limit=min(1.0, time_limit / 10)) if threat_search else None
+        self.nodes = 0
+        self.depth_reached = 0
+        # best root move of an unfinished iteration: (depth, move, value)
+        self.partial = None
+        # background search on the opponent's time: thread, move history it assumes, and its result
+        self.ponder_thread = None
+        self.ponder_history = None
+        self.ponder_result = None
+        self.stats = SearchStats()
+        self.evaluator = None
+        self.heuristic_cache = EvaluationCache(eval_cache_mb)
+        self.transposition_table = TranspositionTable(tt_size_mb)
         self.killer_moves = defaultdict(list)
-        self.initialize_opening_book()
+        # tuned (win_length, patterns) read once here; pattern scores for the win length of the game
+        # being searched are switched by use_win_length
+        self.weights_path = weights_path
+        self.tuned = load_weights(weights_path)
+        self.win_length = None
+        self.use_win_length(5)
+        self.initialize_opening_book(book_path)
+        # instance attributes shadow the methods, so the timers cost nothing when profiling is off
+        if profile:
+            for name in ('evaluate', 'order_moves', 'get_possible_moves'):
+                setattr(self, name, self.timed(name, getattr(self, name)))
 
-    # sets initial known good moves for early-game positions
-    def initialize_opening_book(self):
-        self.opening_book = {
-            tuple(): [(9, 9)],
-        }
+    # wraps a hot-path method to add its running time to the current search stats
+    def timed(self, name, method):
+        def wrapper(*args):
+            start = time.perf_counter()
+            try:
+                return method(*args)
+            finally:
+                self.stats.add_time(name, time.perf_counter() - start)
+        return wrapper
+
+    # switches the pattern scores to another win length, using the tuned weights when they were fitted
+    # for it; cached scores and table entries of the old variant would be wrong for the new one, so
+    # both tables are cleared
+    def use_win_length(self, win_length):
+        if win_length == self.win_length:
+            return
+        self.win_length = win_length
+        if self.tuned is not None and self.tuned[0] == win_length:
+            self.patterns = self.tuned[1]
+        else:
+            self.patterns = PATTERNS if win_length == 5 else default_patterns(win_length)
+        self.pattern_table = pattern_table(self.patterns)
+        self.move_weights = move_weights(self.patterns, win_length)
+        # whether a move is a threat is judged by the built-in scores, whatever the tuned weights say
+        self.threat_weights = move_weights(default_patterns(win_length), win_length)
+        self.heuristic_cache.clear()
+        self.transposition_table.clear()
+        self.killer_moves.clear()
+
+    # loads the on-disk opening book, if there is one
+    def initialize_opening_book(self, book_path):
+        self.opening_book = OpeningBook(book_path)
 
-    # looks up current move history in the opening book
+    # looks up the position in the opening book; the empty board always opens in the centre
     def get_opening_move(self, game):
-        key = tuple(sorted(game.move_history))
-        return self.opening_book.get(key, None)
+        if not game.move_history:
+            return [(game.size // 2, game.size // 2)]
+        move = self.opening_book.lookup(game)
+        return [move] if move else None
 
     # runs iterative deepening using alpha-beta pruning
     def iterative_deepening_search(self, game):
-        start_time = time.time()
-        best_move = None
-        depth = 1
+        move, _ = self.search(game)
+        return move
 
+    # finds a move and returns it with the SearchStats of the search; callback, if given,
+    # is called with each finished iteration (depth, move, value, nodes, seconds)
+    def search(self, game, callback=None):
+        if self.ponder_thread is not None:
+            result = self.stop_pondering(game)
+            if result is not None:
+                return result
+        self.time_manager.start(game)
+        result = self.run_search(game, callback)
+        self.time_manager.finish()
+        return result
+
+    def run_search(self, game, callback=None):
+        self.use_win_length(game.win_length)
+        self.transposition_table.new_search()
+        self.nodes = 0
+        self.depth_reached = 0
+        self.stats = SearchStats()
+        tt_hits, tt_misses = self.transposition_table.hits, self.transposition_table.misses
+        move = self.find_move(game, callback)
+        self.stats.soft_limit, self.stats.hard_limit = self.time_manager.soft, self.time_manager.hard
+        self.stats.depth = self.depth_reached
+        self.stats.tt_hits = self.transposition_table.hits - tt_hits
+        self.stats.tt_probes = self.stats.tt_hits + self.transposition_table.misses - tt_misses
+        self.stats.finish(move, self.nodes)
+        return move, self.stats
+
+    def find_move(self, game, callback):
         # check opening book
         opening_move = self.get_opening_move(game)
         if opening_move:
+            self.stats.source = 'book'
             return opening_move[0]
 
-        # urgent block/win check
-        for move in self.get_possible_moves(game):
-            temp = deepcopy(game)
-            temp.make_move(*move)
-            if temp.check_win(*move):
+        # forced wins and forced blocks found by the threat-space search skip the full search
+        # the threat search gets a share of this move's soft budget, and stops with the search
+        if self.threat_search is not None and game.move_history:
+            manager = self.time_manager
+            deadline = manager.start_time + manager.soft * THREAT_SHARE
+            move = self.threat_search.find_forced_move(deepcopy(game), deadline=deadline,
+                                                       stop_event=manager.stop_event)
+            self.stats.threat_nodes = self.threat_search.nodes
+            if move is not None:
+                self.stats.source = 'threat'
+                return move
+        else:
+            # urgent block/win check - plays each candidate on a scratch board and takes it back
+            temp = self.search_state(game)
+            for move in self.get_possible_moves(temp):
+                temp.make_move(*move)
+                won = temp.winner is not None
+                temp.undo_move()
+                if won:
+                    self.stats.source = 'threat'
+                    return move
+
+        # a single legal move needs no search
+        moves = self.get_possible_moves(game)
+        if len(moves) == 1:
+            self.stats.source = 'forced'
+            return moves[0]
+
+        # a ponder searches in this process: the workers could not follow the budget a ponder hit sets
+        if self.workers > 1 and not self.time_manager.pondering:
+            self.stats.source = 'parallel'
+            return self.parallel_search(game)
+
+        self.stats.source = 'search'
+        best_move = None
+        for depth, move, _ in self.deepen(game, callback=callback):
+            if move:
+                best_move = move
+            self.depth_reached = depth
+        # the root tries the previous best move first, so a better move from the unfinished
+        # iteration has already been searched to the full new depth
+        if self.partial is not None and self.partial[1] is not None:
+            best_move = self.partial[1]
+            self.stats.partial_depth = self.partial[0]
+        return best_move
+
+    # most likely opponent reply in the current position: the table move, else the best ordered candidate
+    def predict_reply(self, game):
+        if game.is_terminal():
+            return None
+        key, symmetry = self.position_key(game)
+        entry = self.transposition_table.probe(key, symmetry)
+        if entry is not None and entry[1] is not None:
+            move = self.from_canonical(entry[1], symmetry, game.size)
+            if game.board[move[0], move[1]] == 0:
                 return move
+        maximizing = self.player == game.current_player
+        moves = self.order_moves(game, self.get_possible_moves(game), maximizing, 0)
+        return moves[0] if moves else None
 
-        while time.time() - start_time < self.time_limit:
+    # after the AI has moved, searches the position after the predicted reply in a background
+    # thread, filling the transposition table while the opponent thinks; returns the predicted reply
+    def ponder(self, game):
+        self.stop_pondering()
+        reply = self.predict_reply(game)
+        if reply is None:
+            return None
+        state = deepcopy(game)
+        state.make_move(*reply)
+        if state.is_terminal():
+            return None
+        self.ponder_history = list(state.move_history)
+        self.ponder_result = None
+        self.time_manager.start(state, ponder=True)
+        self.ponder_thread = threading.Thread(target=self.ponder_search, args=(state,), daemon=True)
+        self.ponder_thread.start()
+        return reply
+
+    def ponder_search(self, state):
+        self.ponder_result = self.run_search(state)
+
+    # ends pondering once the opponent has moved; on a ponder hit (game reached the pondered
+    # position) the search finishes under a normal budget and its (move, stats) is returned,
+    # otherwise it is stopped and None returned
+    def stop_pondering(self, game=None):
+        thread = self.ponder_thread
+        if thread is None:
+            return None
+        hit = game is not None and list(game.move_history) == self.ponder_history
+        if hit:
+            self.time_manager.ponderhit(game)
+        else:
+            self.time_manager.stop()
+        thread.join()
+        self.ponder_thread = None
+        self.time_manager.clear_stop()
+        # a ponder stopped before its first iteration finished has no move, so the caller searches again
+        if not hit or self.ponder_result is None or self.ponder_result[0] is None:
+            return None
+        self.time_manager.finish()
+        self.stats.ponder_hit = True
+        return self.ponder_result
+
+    # searches depth 1, 2, ... while the time manager expects the next iteration to finish,
+    # and returns (depth, move, value) of each finished iteration
+    def deepen(self, game, root_moves=None, callback=None):
+        results = []
+        depth = 1
+        self.partial = None
+        empty = game.size * game.size - len(game.move_history)
+        while (self.max_depth is None or depth <= self.max_depth) and depth <= empty:
+            if results and not self.time_manager.continue_search():
+                break
             try:
-                move, _ = self.alpha_beta_search(game, depth, start_time)
-                if move:
-                    best_move = move
+                # the score swings between odd and even depths, so the window is centred on the same parity
+                previous = results[-2][2] if len(results) >= 2 else None
+                move, value = self.aspiration_search(game, depth, root_moves, previous)
+                self.partial = None
+                results.append((depth, move, value))
+                self.time_manager.add_iteration(depth, move, value, self.nodes)
+                iteration = self.stats.add_iteration(depth, move, value, self.nodes)
+                if callback is not None:
+                    callback(iteration)
                 depth += 1
             except TimeoutError:
                 break
+        return results
+
+    # searches a window around an earlier iteration's score, widening it after a fail low or high
+    def aspiration_search(self, game, depth, root_moves, previous):
+        if previous is None or abs(previous) == float('inf'):
+            return self.alpha_beta_search(game, depth, root_moves)
+        delta = ASPIRATION_WINDOW
+        while delta <= ASPIRATION_WINDOW * 16:
+            alpha, beta = previous - delta, previous + delta
+            move, value = self.alpha_beta_search(game, depth, root_moves, alpha, beta)
+            if alpha < value < beta:
+                return move, value
+            self.stats.aspiration_failures += 1
+            delta *= 4
+        return self.alpha_beta_search(game, depth, root_moves)
+
+    # root splitting: each worker deepens on its own share of the ordered root moves, and the best
+    # move is taken from the deepest iteration every worker finished
+    def parallel_search(self, game):
+        maximizing = self.player == game.current_player
+        moves = self.order_moves(game, self.get_possible_moves(game), maximizing, 0)
+        shares = [moves[i::self.workers] for i in range(self.workers)]
+        shares = [share for share in shares if share]
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker,
+                                                initargs=(self.time_manager.stop_event,))
+        options = {
+            'tt_size_mb': self.tt_size_mb,
+            'eval_cache_mb': self.eval_cache_mb,
+            'evaluation': self.evaluation,
+            'symmetry': self.symmetry,
+            'max_depth': self.max_depth,
+            'lmr': self.lmr,
+            'null_move': self.null_move,
+            'quiescence': self.quiescence,
+            'weights_path': self.weights_path,
+        }
+        futures = [self.executor.submit(root_search_worker, self.player, options, game.size, game.backend,
+                                        game.win_length, list(game.move_history), share, self.time_manager.start_time,
+                                        (self.time_manager.soft, self.time_manager.hard))
+                   for share in shares]
+        results = []
+        for future in futures:
+            share_results, nodes = future.result()
+            self.nodes += nodes
+            results.append(share_results)
+
+        finished = [share_results for share_results in results if share_results]
+        if not finished:
+            return moves[0]
+        depth = min(share_results[-1][0] for share_results in finished)
+        self.depth_reached = depth
+        best_move, best_value = None, None
+        for share_results in finished:
+            _, move, value = share_results[depth - 1]
+            if best_value is None or (value > best_value if maximizing else value < best_value):
+                best_move, best_value = move, value
         return best_move
 
-    # recursive function for alpha-beta search
-    def alpha_beta_search(self, game, depth, start_time):
+    # stops pondering and shuts down the worker pool used by parallel_search
+    def close(self):
+        self.stop_pondering()
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    # recursive function for alpha-beta search; root_moves restricts the moves tried at the root
+    def alpha_beta_search(self, game, depth, root_moves=None, alpha=-float('inf'), beta=float('inf')):
         def recurse(state, depth, alpha, beta, maximizing, last_move, ply):
-            alpha_orig = alpha
+            self.nodes += 1
             # transposition table lookup - avoid re-searching previously seen positions
-            key = tuple(map(tuple, state.board))
-            if key in self.transposition_table:
-                entry = self.transposition_table[key]
-                if entry['depth'] >= depth:
+            key, symmetry = self.position_key(state)
+            entry = self.transposition_table.probe(key, symmetry)
+            tt_move = None
+            if entry is not None:
+                entry_value, entry_move, entry_depth, entry_flag = entry
+                entry_move = self.from_canonical(entry_move, symmetry, state.size)
+                tt_move = entry_move
+                if entry_depth >= depth:
                     # precise value for this position
-                    if entry['flag'] == 'EXACT':
-                        return entry['move'], entry['value']
+                    if entry_flag == EXACT:
+                        return entry_move, entry_value
                     # value at least this good - alpha
-                    elif entry['flag'] == 'LOWER':
-                        alpha = max(alpha, entry['value'])
+                    elif entry_flag == LOWER:
+                        alpha = max(alpha, entry_value)
                     # value at most this good - beta
-                    elif entry['flag'] == 'UPPER':
-                        beta = min(beta, entry['value'])
+                    elif entry_flag == UPPER:
+                        beta = min(beta, entry_value)
                     if alpha >= beta:
-                        return entry['move'], entry['value']
+                        return entry_move, entry_value
+            alpha_orig, beta_orig = alpha, beta
 
-            # ensures AI doesn't exceed time limit
-            if time.time() - start_time > self.time_limit:
-                raise TimeoutError()
+            # ensures AI doesn't exceed time limit, reading the clock every few hundred nodes
+            self.time_manager.check(self.nodes)
 
-            if depth == 0 or state.is_terminal():
+            if state.is_terminal():
+                return None, self.evaluate(state)
+            if depth <= 0:
+                if self.quiescence:
+                    self.quiescence_budget = QUIESCENCE_NODES
+                    return None, self.quiesce(state, alpha, beta, maximizing, 0)
                 return None, self.evaluate(state)
 
-            moves = self.get_possible_moves(state)
+            # null-move pruning: if the side to move could pass and still fail high, a real move
+            # would too; never twice in a row (last_move None) and never when a threat is on the board
+            bound = beta if maximizing else alpha
+            if (self.null_move and ply > 0 and depth >= NULL_MIN_DEPTH and last_move is not None
+                    and abs(bound) != float('inf') and not self.threatened(state)):
+                state.make_null_move()
+                try:
+                    if maximizing:
+                        _, null_val = recurse(state, depth - 1 - NULL_REDUCTION, beta - 1, beta, False, None, ply + 1)
+                    else:
+                        _, null_val = recurse(state, depth - 1 - NULL_REDUCTION, alpha, alpha + 1, True, None, ply + 1)
+                finally:
+                    state.undo_null_move()
+                if null_val >= beta if maximizing else null_val <= alpha:
+                    self.stats.null_cutoffs += 1
+                    return None, null_val
+
+            moves = root_moves if ply == 0 and root_moves else self.get_possible_moves(state)
             if not moves:
                 return None, self.evaluate(state)
 
             moves = self.order_moves(state, moves, maximizing, ply)
+            # the best move from an earlier search of this position (the PV move) goes first
+            if tt_move is not None and tt_move in moves:
+                moves.remove(tt_move)
+                moves.insert(0, tt_move)
             best_move = moves[0]
+            self.stats.interior_nodes += 1
+
+            # frontier node without quiescence: every child is a leaf, so children are scored in
+            # batched passes over stacked child boards, a small batch first since it usually cuts off
+            if depth == 1 and ply > 0 and not self.quiescence:
+                value = -float('inf') if maximizing else float('inf')
+                start, batch = 0, FRONTIER_BATCH
+                while start < len(moves):
+                    chunk = moves[start:start + batch]
+                    values = self.evaluate_children(state, chunk)
+                    self.nodes += len(chunk)
+                    self.time_manager.check(self.nodes)
+                    i = int(np.argmax(values) if maximizing else np.argmin(values))
+                    if values[i] > value if maximizing else values[i] < value:
+                        value, best_move = int(values[i]), chunk[i]
+                    cutoffs = np.flatnonzero(values >= beta if maximizing else values <= alpha)
+                    if len(cutoffs):
+                        self.record_cutoff(chunk[cutoffs[0]], moves, ply)
+                        break
+                    start += batch
+                    batch *= 4
 
+            # principal variation search: the first move gets the full window, the rest a null
+            # window that only proves them worse, with a full re-search when one turns out better;
+            # late quiet moves are tried at reduced depth first and re-searched at full depth if they beat the bound
             # maximizing player (AI)
-            if maximizing:
+            elif maximizing:
                 value = -float('inf')
-                for move in moves:
-                    new_state = deepcopy(state)
-                    new_state.make_move(*move)
-                    _, new_val = recurse(new_state, depth - 1, alpha, beta, False, move, ply + 1)
+                for i, move in enumerate(moves):
+                    reduction = self.reduction(state, move, i, depth, ply)
+                    state.make_move(*move)
+                    try:
+                        if i == 0:
+                            _, new_val = recurse(state, depth - 1, alpha, beta, False, move, ply + 1)
+                        else:
+                            _, new_val = recurse(state, depth - 1 - reduction, alpha, alpha + 1, False, move, ply + 1)
+                            if reduction and new_val > alpha:
+                                self.stats.reduction_researches += 1
+                                _, new_val = recurse(state, depth - 1, alpha, alpha + 1, False, move, ply + 1)
+                            if alpha < new_val < beta:
+                                self.stats.research_count += 1
+                                _, new_val = recurse(state, depth - 1, alpha, beta, False, move, ply + 1)
+                    finally:
+                        state.undo_move()
                     if new_val > value:
                         value = new_val
                         best_move = move
+                        if ply == 0 and value > alpha_orig:
+                            self.partial = (depth, move, value)
                     alpha = max(alpha, value)
                     if alpha >= beta:
-                        if move not in self.killer_moves[ply]:
-                            self.killer_moves[ply].append(move)
+                        self.record_cutoff(move, moves, ply)
                         break
-                    
+
             # minimizing player (player 1)
             else:
                 value = float('inf')
-                for move in moves:
-                    new_state = deepcopy(state)
-                    new_state.make_move(*move)
-                    _, new_val = recurse(new_state, depth - 1, alpha, beta, True, move, ply + 1)
+                for i, move in enumerate(moves):
+                    reduction = self.reduction(state, move, i, depth, ply)
+                    state.make_move(*move)
+                    try:
+                        if i == 0:
+                            _, new_val = recurse(state, depth - 1, alpha, beta, True, move, ply + 1)
+                        else:
+                            _, new_val = recurse(state, depth - 1 - reduction, beta - 1, beta, True, move, ply + 1)
+                            if reduction and new_val < beta:
+                                self.stats.reduction_researches += 1
+                                _, new_val = recurse(state, depth - 1, beta - 1, beta, True, move, ply + 1)
+                            if alpha < new_val < beta:
+                                self.stats.research_count += 1
+                                _, new_val = recurse(state, depth - 1, alpha, beta, True, move, ply + 1)
+                    finally:
+                        state.undo_move()
                     if new_val < value:
                         value = new_val
                         best_move = move
+                        if ply == 0 and value < beta_orig:
+                            self.partial = (depth, move, value)
                     beta = min(beta, value)
                     if alpha >= beta:
-                        if move not in self.killer_moves[ply]:
-                            self.killer_moves[ply].append(move)
+                        self.record_cutoff(move, moves, ply)
                         break
 
-            flag = 'EXACT'
+            flag = EXACT
             if value <= alpha_orig:
-                flag = 'UPPER'
-            elif value >= beta:
-                flag = 'LOWER'
-            self.transposition_table[key] = {
-                'value': value,
-                'move': best_move,
-                'depth': depth,
-                'flag': flag
-            }
+                flag = UPPER
+            elif value >= beta_orig:
+                flag = LOWER
+            self.transposition_table.store(key, value, self.to_canonical(best_move, symmetry, state.size),
+                                           depth, flag, symmetry)
             return best_move, value
 
-        return recurse(deepcopy(game), depth, -float('inf'), float('inf'), self.player == game.current_player, None, 0)
+        # searches on a single private copy of the game, making and unmaking moves in place
+        return recurse(self.search_state(game), depth, alpha, beta, self.player == game.current_player, None, 0)
+
+    # searches only threat moves below the horizon until the position is quiet, looking for
+    # threats on the lines through the last stones: a five on the board next move is played and a
+    # four against the side to move must be blocked; otherwise the side to move may stand on the
+    # static score, and pending open threes are resolved by making fours or blocking the opponent's
+    def quiesce(self, game, alpha, beta, maximizing, qply):
+        self.nodes += 1
+        self.stats.quiescence_nodes += 1
+        self.quiescence_budget -= 1
+        self.time_manager.check(self.nodes)
+        if game.is_terminal():
+            return self.evaluate(game)
+        grid = game.board.tolist()
+        player = game.current_player
+        win_length = game.win_length
+        recent = game.move_history[-4:]
+        mine = [stone for stone in recent if grid[stone[0]][stone[1]] == player]
+        theirs = [stone for stone in recent if grid[stone[0]][stone[1]] == 3 - player]
+
+        wins = set()
+        for row, col in mine:
+            wins |= five_cells_through(grid, row, col, player, win_length)
+        blocks = set()
+        for row, col in theirs:
+            blocks |= five_cells_through(grid, row, col, 3 - player, win_length)
+        forced = bool(wins) or (bool(blocks) and qply < QUIESCENCE_MAX_PLY)
+        if wins:
+            moves = [min(wins)]
+        elif forced:
+            moves = sorted(blocks)
+        else:
+            # stand pat: the side to move is not forced, so the static score is a bound
+            value = self.evaluate(game)
+            if blocks or qply >= QUIESCENCE_MAX_PLY or self.quiescence_budget <= 0:
+                return value
+            if maximizing:
+                if value >= beta:
+                    return value
+                alpha = max(alpha, value)
+            else:
+                if value <= alpha:
+                    return value
+                beta = min(beta, value)
+            # an open three of the side to move becomes a four; an open three of the opponent is
+            # answered by blocking it or by a four that gains time
+            own_threes = any(open_four_cells(grid, row, col, player, win_length) for row, col in mine)
+            counters = set()
+            for row, col in theirs:
+                counters.update(open_four_cells(grid, row, col, 3 - player, win_length))
+            if not own_threes and not counters:
+                return value
+            cells = set()
+            for row, col in mine:
+                cells.update(line_cells(grid, row, col, win_length - 1))
+            moves = sorted(four_moves(grid, cells, player, win_length))
+            moves += sorted(counters - set(moves))
+            if not moves:
+                return value
+
+        best = None
+        for move in moves:
+            game.make_move(*move)
+            try:
+                new_val = self.quiesce(game, alpha, beta, not maximizing, qply + 1)
+            finally:
+                game.undo_move()
+            if maximizing:
+                best = new_val if best is None else max(best, new_val)
+                alpha = max(alpha, best)
+            else:
+                best = new_val if best is None else min(best, new_val)
+                beta = min(beta, best)
+            if alpha >= beta:
+                break
+        if not forced:
+            # the stand-pat score is still available when every threat move turns out worse
+            best = max(best, value) if maximizing else min(best, value)
+        return best
+
+    # plies to reduce a move by: late quiet moves only, never the first few, killers, or moves
+    # that make or block an open three or a four
+    def reduction(self, game, move, index, depth, ply):
+        if not self.lmr or depth < LMR_DEPTH or index < LMR_MOVES or move in self.killer_moves.get(ply, ()):
+            return 0
+        row, col = move
+        player = game.current_player
+        # the open-three score is the smallest evaluate_move score of a move that makes or blocks a threat
+        quiet_limit = self.threat_weights[2]
+        if (self.evaluate_move(game, row, col, player, self.threat_weights) >= quiet_limit
+                or self.evaluate_move(game, row, col, 3 - player, self.threat_weights) >= quiet_limit):
+            return 0
+        self.stats.reductions += 1
+        return min(1 if index < LMR_DEEP_MOVES else 2, depth - 2)
 
-    # generates list of empty positions near existing stones
+    # whether a recent stone made a four for either side, or an open three for the side not to move;
+    # null-move pruning is unsound in those positions because passing loses at once
+    def threatened(self, game):
+        grid = game.board.tolist()
+        opponent = 3 - game.current_player
+        for row, col in game.move_history[-4:]:
+            player = grid[row][col]
+            if five_cells_through(grid, row, col, player, game.win_length):
+                return True
+            if player == opponent and open_four_cells(grid, row, col, player, game.win_length):
+                return True
+        return False
+
+    # counts a beta cutoff and remembers the refuting move as a killer for this ply
+    def record_cutoff(self, move, moves, ply):
+        stats = self.stats
+        stats.cutoffs += 1
+        if move == moves[0]:
+            stats.first_move_cutoffs += 1
+        if move in self.killer_moves[ply]:
+            stats.killer_cutoffs += 1
+        else:
+            self.killer_moves[ply].append(move)
+
+    # table key of a position: the canonical hash over board symmetries, or the plain hash
+    def position_key(self, game):
+        if self.symmetry:
+            return game.canonical_hash()
+        return game.hash, 0
+
+    # moves are stored in the canonical orientation and mapped back on lookup
+    def to_canonical(self, move, symmetry, size):
+        if move is None or symmetry == 0:
+            return move
+        return transform_cell(move[0], move[1], symmetry, size)
+
+    def from_canonical(self, move, symmetry, size):
+        if move is None or symmetry == 0:
+            return move
+        return transform_cell(move[0], move[1], inverse_symmetry(symmetry), size)
+
+    # private copy of the game that the search makes and unmakes moves on
+    def search_state(self, game):
+        state = deepcopy(game)
+        if self.evaluation == 'incremental':
+            self.evaluator = IncrementalEvaluator(state, self.patterns)
+        return state
+
+    # hit/miss/collision counters and memory use of the bounded tables, for monitoring
+    def table_stats(self):
+        return {
+            'transposition_table': self.transposition_table.stats(),
+            'heuristic_cache': self.heuristic_cache.stats(),
+        }
+
+    # generates list of empty positions near existing stones, from the set OmokGame maintains on each move
     def get_possible_moves(self, game):
         if not game.move_history:
             return [(game.size // 2, game.size // 2)]
+        return list(game.candidates)
 
-        moves = set()
-        for (r, c) in game.move_history:
-            for dr in range(-2, 3):
-                for dc in range(-2, 3):
-                    nr, nc = r + dr, c + dc
-                    if 0 <= nr < game.size and 0 <= nc < game.size and game.board[nr][nc] == 0:
-                        moves.add((nr, nc))
-        return list(moves)
+    # returns numeric score of the position from the AI's point of view using the selected backend
+    def evaluate(self, game):
+        # the incremental evaluator already holds the score of the search board
+        if self.evaluator is not None and self.evaluator.game is game:
+            return self.evaluator.score(self.player)
+        if self.evaluation == 'vectorized':
+            return self.evaluate_vectorized(game)
+        return self.evaluate_loop(game)
+
+    # whole-board evaluation in one NumPy pass over every line, for root scoring and analysis
+    def evaluate_vectorized(self, game):
+        key = self.position_key(game)[0]
+        cached = self.heuristic_cache.probe(key)
+        if cached is not None:
+            return cached
+        score = vectorized_score(game.board, self.player, self.pattern_table)
+        self.heuristic_cache.store(key, score)
+        return score
 
     # returns numeric score for all lines and patterns, and adds positive/negative score of pattern benefits the AI or player
-    def evaluate(self, game):
+    def evaluate_loop(self, game):
         board = game.board
-        if tuple(map(tuple, board)) in self.heuristic_cache:
-            return self.heuristic_cache[tuple(map(tuple, board))]
-
-        patterns = {
-            (5, 0): 1000000,
-            (4, 2): 100000,
-            (4, 1): 50000,
-            (3, 2): 10000,
-            (3, 1): 2000,
-            (2, 2): 1000,
-            (2, 1): 100,
-            (1, 2): 50,
-            (1, 1): 10
-        }
+        key = self.position_key(game)[0]
+        cached = self.heuristic_cache.probe(key)
+        if cached is not None:
+            return cached
 
+        patterns = self.patterns
         score = 0
         center = game.size // 2
         for i in range(game.size):
             for j in range(game.size):
-                if board[i][j] != 0:
-                    player = board[i][j]
+                if board[i, j] != 0:
+                    player = board[i, j]
                     for dr, dc in game.directions:
                         length = 1
                         open_ends = 0
                         blocked = False
 
                         r, c = i + dr, j + dc
-                        while 0 <= r < game.size and 0 <= c < game.size and board[r][c] == player:
+                        while 0 <= r < game.size and 0 <= c < game.size and board[r, c] == player:
                             length += 1
                             r += dr
                             c += dc
-                        if 0 <= r < game.size and 0 <= c < game.size and board[r][c] == 0:
+                        if 0 <= r < game.size and 0 <= c < game.size and board[r, c] == 0:
                             open_ends += 1
 
                         r, c = i - dr, j - dc
-                        while 0 <= r < game.size and 0 <= c < game.size and board[r][c] == player:
+                        while 0 <= r < game.size and 0 <= c < game.size and board[r, c] == player:
                             length += 1
                             r -= dr
                             c -= dc
-                        if 0 <= r < game.size and 0 <= c < game.size and board[r][c] == 0:
+                        if 0 <= r < game.size and 0 <= c < game.size and board[r, c] == 0:
                             open_ends += 1
 
                         for (l, o), val in patterns.items():
@@ -199,63 +761,73 @@ class OmokAI:
                                 break
 
         # uses heuristic_cache for speed
-        self.heuristic_cache[tuple(map(tuple, board))] = score
+        self.heuristic_cache.store(key, score)
         return score
 
-    # looks for chain length and number of open ends
-    def evaluate_move(self, game, row, col, player):
+    # static scores of the positions after each of moves, as an array, from one stacked-board pass
+    def evaluate_children(self, game, moves):
+        return batch_child_scores(np.asarray(game.board), moves, game.current_player, self.player, self.pattern_table)
+
+    # evaluate_move for every move at once, as an array
+    def score_moves(self, game, moves, player):
+        return batch_move_scores(np.asarray(game.board), moves, player, game.win_length, self.move_weights)
+
+    # looks for chain length and number of open ends; weights replaces move_weights
+    def evaluate_move(self, game, row, col, player, weights=None):
         score = 0
         center = game.size // 2
         dist = max(abs(row - center), abs(col - center))
         score += (game.size - dist)
+        win_length = game.win_length
+        win, four, three = weights or self.move_weights
 
         for dr, dc in game.directions:
             count = 1
             open_ends = 0
 
-            for i in range(1, 5):
+            for i in range(1, win_length):
                 r, c = row + dr * i, col + dc * i
                 if 0 <= r < game.size and 0 <= c < game.size:
-                    if game.board[r][c] == player:
+                    if game.board[r, c] == player:
                         count += 1
-                    elif game.board[r][c] == 0:
+                    elif game.board[r, c] == 0:
                         open_ends += 1
                         break
                     else:
                         break
 
-            for i in range(1, 5):
+            for i in range(1, win_length):
                 r, c = row - dr * i, col - dc * i
                 if 0 <= r < game.size and 0 <= c < game.size:
-                    if game.board[r][c] == player:
+                    if game.board[r, c] == player:
                         count += 1
-                    elif game.board[r][c] == 0:
+                    elif game.board[r, c] == 0:
                         open_ends += 1
                         break
                     else:
                         break
 
             # quickly scores potential move
-            if count >= 5:
-                score += 1000000
-            elif count == 4 and open_ends >= 1:
-                score += 50000
-            elif count == 3 and open_ends == 2:
-                score += 10000
+            if count >= win_length:
+                score += win
+            elif count == win_length - 1 and open_ends >= 1:
+                score += four
+            elif count == win_length - 2 and count >= 2 and open_ends == 2:
+                score += three
             else:
                 score += count ** 2 * (open_ends + 1)
 
         return score
 
     # sorts moves by heuristic score - to improve alpha-beta efficiency
+    # all candidates are scored in one batched pass; ties go to the larger (row, col) as before
     def order_moves(self, game, moves, maximizing_player, ply):
         player = self.player if maximizing_player else 3 - self.player
-        scored = []
-        for move in moves:
-            score = self.evaluate_move(game, move[0], move[1], player)
-            # adds bonus to killer moves
-            if move in self.killer_moves.get(ply, []):
-                score += 10000
-            scored.append((score, move))
-        scored.sort(reverse=True)
-        return [m for s, m in scored]
\ No newline at end of file
+        scores = self.score_moves(game, moves, player)
+        # adds bonus to killer moves
+        for killer in self.killer_moves.get(ply, []):
+            if killer in moves:
+                scores[moves.index(killer)] += 10000
+        cells = np.asarray(moves)
+        order = np.lexsort((cells[:, 1], cells[:, 0], scores))[::-1]
+        return [moves[i] for i in order]
\ No newline at end of file
@@ -0,0 +1,104 @@
+import argparse
+import json
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from ai import OmokAI
+from evaluation import default_patterns, pattern_table, vectorized_score
+from records import RecordReader
+
+# games handed to a worker at a time; each worker maps the record file itself, so only offsets are sent
+CHUNK_GAMES = 64
+# chunks queued per worker, so results stream out without holding the whole file's futures
+CHUNKS_AHEAD = 4
+
+# plies of a game to annotate: from min_ply up to max_ply (inclusive) in steps of every
+def selected_plies(plies, min_ply=0, max_ply=None, every=1):
+    last = plies - 1 if max_ply is None else min(max_ply, plies - 1)
+    return range(min_ply, last + 1, every)
+
+# replays the games at offsets (numbered from first) of a record file and annotates the selected
+# positions: the static score for the side to move, and with depth a fixed-depth search of the position
+def analyze_chunk(path, offsets, first, min_ply=0, max_ply=None, every=1, depth=None, options=None):
+    reader = RecordReader(path, offsets)
+    tables = {}
+    ais = {}
+    annotations = []
+    for index in range(len(reader)):
+        header, moves = reader[index]
+        win_length = int(header['win_length'])
+        if win_length not in tables:
+            tables[win_length] = pattern_table(default_patterns(win_length))
+        winner = reader.winner(index)
+        plies = selected_plies(len(moves), min_ply, max_ply, every)
+        if not len(plies):
+            continue
+        game = reader.replay(index, plies[0])
+        played = moves.tolist()
+        for ply in range(plies[0], plies[-1] + 1):
+            if ply in plies and not game.is_terminal():
+                player = game.current_player
+                entry = {
+                    'game': first + index,
+                    'ply': ply,
+                    'player': player,
+                    'move': played[ply],
+                    'winner': winner,
+                    'score': int(vectorized_score(game.board, player, tables[win_length])),
+                }
+                if depth is not None:
+                    if player not in ais:
+                        ais[player] = OmokAI(player, **dict(options or {}, max_depth=depth))
+                    move, stats = ais[player].search(game)
+                    entry['search_move'] = list(move) if move is not None else None
+                    entry['search_value'] = stats.iterations[-1]['value'] if stats.iterations else None
+                    entry['nodes'] = stats.nodes
+                    entry['source'] = stats.source
+                annotations.append(entry)
+            game.make_move(*played[ply])
+    for ai in ais.values():
+        ai.close()
+    return annotations
+
+# streams annotations of every game in a record file to output as JSON lines, in game order,
+# with chunks of games analyzed in parallel; returns the number of positions written
+def analyze(path, output, workers=1, games=None, chunk=CHUNK_GAMES, **options):
+    offsets = RecordReader(path).offsets[:games]
+    starts = iter(range(0, len(offsets), chunk))
+    pending = deque()
+    count = 0
+    with open(output, 'w') as out, ProcessPoolExecutor(max_workers=workers) as pool:
+        while True:
+            while len(pending) < workers * CHUNKS_AHEAD:
+                start = next(starts, None)
+                if start is None:
+                    break
+                pending.append(pool.submit(analyze_chunk, path, offsets[start:start + chunk], start, **options))
+            if not pending:
+                break
+            for entry in pending.popleft().result():
+                out.write(json.dumps(entry, separators=(',', ':')) + '\n')
+                count += 1
+    return count
+
+def main():
+    parser = argparse.ArgumentParser(description="Annotate positions from a game record file.")
+    parser.add_argument('records', help="record file written by main.py, selfplay.py or records.RecordWriter")
+    parser.add_argument('--output', default='analysis.jsonl')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--games', type=int, default=None, help="only the first this many games")
+    parser.add_argument('--min-ply', type=int, default=0)
+    parser.add_argument('--max-ply', type=int, default=None)
+    parser.add_argument('--every', type=int, default=1, help="annotate every n-th ply")
+    parser.add_argument('--depth', type=int, default=None, help="also run a fixed-depth search on each position")
+    parser.add_argument('--time-limit', type=float, default=60, help="seconds per search, a safety cap on --depth")
+    args = parser.parse_args()
+
+    options = {'time_limit': args.time_limit, 'book_path': None, 'threat_search': False}
+    start = time.perf_counter()
+    count = analyze(args.records, args.output, args.workers, args.games, min_ply=args.min_ply,
+                    max_ply=args.max_ply, every=args.every, depth=args.depth, options=options)
+    print(f"{count} positions in {time.perf_counter() - start:.1f}s -> {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+import tracemalloc
+import numpy as np
+from game import OmokGame
+from ai import OmokAI
+from evaluation import (IncrementalEvaluator, PATTERNS, pattern_table, vectorized_score, batch_move_scores,
+                        batch_child_scores)
+from threats import five_cells
+import TicTacToe
+
+# every OmokAI here runs without the opening book and tuned weights files, so results only depend on the code
+
+# fixed corpus of positions as move lists, black first
+OPENING = [(9, 9), (9, 10), (10, 10), (8, 8)]
+MIDGAME = [(9, 9), (9, 10), (10, 10), (8, 8), (10, 9), (11, 11), (8, 10), (10, 8), (11, 9),
+           (12, 9), (7, 11), (6, 12), (11, 10), (12, 11), (9, 11), (7, 9), (12, 10), (13, 11)]
+# black to move has a broken three and a two that combine into threats
+TACTICAL = [(9, 9), (0, 0), (9, 10), (0, 3), (10, 12), (0, 6), (11, 12), (0, 9)]
+
+# deterministic near-full board where neither side has a five or a cell completing one
+def near_full_moves(size=19, stones=260, seed=7):
+    rng = random.Random(seed)
+    game = OmokGame(size)
+    cells = [(r, c) for r in range(size) for c in range(size)]
+    rng.shuffle(cells)
+    for cell in cells:
+        if len(game.move_history) == stones:
+            break
+        game.make_move(*cell)
+        grid = game.board.tolist()
+        if (game.winner is not None or five_cells(grid, game.candidates, 1)
+                or five_cells(grid, game.candidates, 2)):
+            game.undo_move()
+    return list(game.move_history)
+
+def corpus():
+    return {
+        'opening': OPENING,
+        'midgame': MIDGAME,
+        'tactical': TACTICAL,
+        'near_full': near_full_moves(),
+    }
+
+def build_game(moves, backend='numpy'):
+    game = OmokGame(backend=backend)
+    for move in moves:
+        game.make_move(*move)
+    return game
+
+# calls fn repeatedly for at least min_time seconds and returns calls per second
+def throughput(fn, min_time):
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        fn()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return calls / elapsed
+
+def search_ai(game, depth):
+    return OmokAI(game.current_player, time_limit=3600, max_depth=depth, threat_search=False, book_path=None,
+                  weights_path=None)
+
+# fixed-depth search: nodes, nodes/second, time to reach each depth and table memory
+def bench_search(moves, depth):
+    game = build_game(moves)
+    ai = search_ai(game, depth)
+    move, stats = ai.search(game)
+    tables = ai.table_stats()
+    # tracing slows the search down a lot, so peak memory comes from a separate run
+    tracemalloc.start()
+    search_ai(game, depth).search(game)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'move': move,
+        'depth': stats.depth,
+        'nodes': stats.nodes,
+        'seconds': stats.elapsed,
+        'nodes_per_second': stats.nodes_per_second,
+        'time_to_depth': {it['depth']: it['seconds'] for it in stats.iterations},
+        'tt_hit_rate': stats.tt_hit_rate,
+        'cutoff_rate': stats.cutoff_rate,
+        'tt_bytes': tables['transposition_table']['bytes'],
+        'eval_cache_bytes': tables['heuristic_cache']['bytes'],
+        'search_peak_bytes': peak,
+    }
+
+# evaluations per second for each backend, check_win per second for each board backend
+def bench_position(moves, min_time):
+    game = build_game(moves)
+    result = {'stones': len(moves)}
+    ai = OmokAI(2, book_path=None, weights_path=None, evaluation='loop')
+
+    def loop():
+        ai.heuristic_cache.clear()
+        ai.evaluate_loop(game)
+    result['evaluate_loop_per_second'] = throughput(loop, min_time)
+    table = pattern_table(PATTERNS)
+    result['evaluate_vectorized_per_second'] = throughput(lambda: vectorized_score(game.board, 2, table), min_time)
+
+    evaluator = IncrementalEvaluator(game)
+    cell = min(game.candidates) if game.candidates else (0, 0)
+
+    def incremental():
+        game.make_move(*cell)
+        evaluator.score(2)
+        game.undo_move()
+    result['incremental_make_undo_per_second'] = throughput(incremental, min_time)
+    evaluator.detach()
+
+    for backend in ('numpy', 'bitboard'):
+        board_game = build_game(moves, backend)
+        stones = board_game.move_history
+
+        def check_all():
+            for r, c in stones:
+                board_game.check_win(r, c)
+        result[f'check_win_{backend}_per_second'] = throughput(check_all, min_time) * max(1, len(stones))
+    result['get_possible_moves_per_second'] = throughput(lambda: ai.get_possible_moves(game), min_time)
+    return result
+
+# deterministic random position with at least `candidates` candidate moves
+def candidate_position(candidates, seed=11):
+    rng = random.Random(seed)
+    game = OmokGame()
+    game.make_move(9, 9)
+    while len(game.candidates) < candidates:
+        game.make_move(*rng.choice(sorted(game.candidates)))
+    return game
+
+# per-move Python scoring against the batched NumPy path, for move ordering and for scoring
+# the leaf children of a frontier node, at typical candidate counts
+def bench_batching(min_time, counts=(40, 80, 120)):
+    results = {}
+    for count in counts:
+        game = candidate_position(count)
+        moves = sorted(game.candidates)
+        ai = OmokAI(2, book_path=None, weights_path=None)
+        player = game.current_player
+        loop = throughput(lambda: [ai.evaluate_move(game, r, c, player) for r, c in moves], min_time)
+        batch = throughput(lambda: batch_move_scores(game.board, moves, player), min_time)
+
+        evaluator = IncrementalEvaluator(game)
+
+        def children():
+            for move in moves:
+                game.make_move(*move)
+                evaluator.score(2)
+                game.undo_move()
+        incremental = throughput(children, min_time)
+        evaluator.detach()
+        stacked = throughput(lambda: batch_child_scores(game.board, moves, player, 2, ai.pattern_table), min_time)
+        results[len(moves)] = {
+            'move_scores_loop_per_second': loop,
+            'move_scores_batch_per_second': batch,
+            'move_scores_speedup': batch / loop,
+            'child_scores_incremental_per_second': incremental,
+            'child_scores_stacked_per_second': stacked,
+            'child_scores_speedup': stacked / incremental,
+        }
+    return results
+
+# small sanity benchmark on the TicTacToe minimax search and the perfect-play table
+def bench_tictactoe():
+    result = {}
+    for depth in (2, 9):
+        state = np.zeros((TicTacToe.rows, TicTacToe.cols))
+        start = time.perf_counter()
+        value, _ = TicTacToe.minimax(state, TicTacToe.neg_inf, TicTacToe.inf, True, depth, 2, 1)
+        result[f'depth_{depth}'] = {'value': float(value), 'seconds': time.perf_counter() - start}
+    start = time.perf_counter()
+    table = TicTacToe.solveTable()
+    result['solve_seconds'] = time.perf_counter() - start
+    result['empty_board_value'] = int(table[0, 0])
+    state = np.zeros((TicTacToe.rows, TicTacToe.cols))
+    TicTacToe.loadTable()
+    result['table_moves_per_second'] = throughput(lambda: TicTacToe.perfectMove(state, 1), 0.2)
+    return result
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(depth=3, min_time=0.5, positions=None):
+    results = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'depth': depth,
+        'positions': {},
+    }
+    for name, moves in corpus().items():
+        if positions and name not in positions:
+            continue
+        entry = bench_position(moves, min_time)
+        entry['search'] = bench_search(moves, depth)
+        results['positions'][name] = entry
+    results['batching'] = bench_batching(min_time)
+    results['tictactoe'] = bench_tictactoe()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Omok search and evaluation on a fixed corpus.")
+    parser.add_argument('--depth', type=int, default=3, help="fixed search depth")
+    parser.add_argument('--min-time', type=float, default=0.5, help="seconds per throughput measurement")
+    parser.add_argument('--positions', nargs='*', help="subset of opening, midgame, tactical, near_full")
+    parser.add_argument('--output', help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    results = run(args.depth, args.min_time, args.positions)
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
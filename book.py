@@ -0,0 +1,66 @@
+import os
+from collections import defaultdict
+import numpy as np
+from game import transform_cell, inverse_symmetry
+
+# one record per position: canonical position hash, best move in canonical orientation, games seen
+BOOK_DTYPE = np.dtype([('key', '<u8'), ('move', '<u2'), ('games', '<u4')])
+
+DEFAULT_BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'opening_book.npy')
+
+class OpeningBook:
+    # memory-maps a book file written by OpeningBookBuilder.save; a missing file gives an empty book
+    # books are built from five-in-a-row games, so games with another win_length never hit it
+    def __init__(self, path=None, win_length=5):
+        self.path = path
+        self.win_length = win_length
+        self.entries = np.zeros(0, dtype=BOOK_DTYPE)
+        if path and os.path.exists(path):
+            self.entries = np.load(path, mmap_mode='r')
+        self.keys = self.entries['key']
+
+    def __len__(self):
+        return len(self.entries)
+
+    # book move for the position in the game's real orientation, or None
+    def lookup(self, game):
+        if not len(self.entries) or game.win_length != self.win_length:
+            return None
+        key, symmetry = game.canonical_hash()
+        i = np.searchsorted(self.keys, key)
+        if i == len(self.keys) or self.keys[i] != key:
+            return None
+        code = int(self.entries['move'][i])
+        row, col = transform_cell(code // game.size, code % game.size, inverse_symmetry(symmetry), game.size)
+        if game.board[row, col] != 0:
+            return None
+        return row, col
+
+class OpeningBookBuilder:
+    # collects per-position move statistics from finished games
+    def __init__(self, plies=12):
+        self.plies = plies
+        # canonical key -> canonical move -> [games, points for the side that played it]
+        self.stats = defaultdict(lambda: defaultdict(lambda: [0, 0.0]))
+
+    # replays a finished game and credits the first `plies` moves with its result (winner None is a draw)
+    def add_game(self, game_cls, size, moves, winner):
+        game = game_cls(size)
+        for move in moves[:self.plies]:
+            key, symmetry = game.canonical_hash()
+            r, c = transform_cell(move[0], move[1], symmetry, size)
+            entry = self.stats[key][r * size + c]
+            entry[0] += 1
+            entry[1] += 0.5 if winner is None else float(winner == game.current_player)
+            game.make_move(*move)
+
+    # keeps the best-scoring move of every position seen in at least min_games games
+    def save(self, path, min_games=1):
+        records = []
+        for key, moves in self.stats.items():
+            code, (games, points) = max(moves.items(), key=lambda item: (item[1][1] / item[1][0], item[1][0]))
+            if games >= min_games:
+                records.append((key, code, games))
+        entries = np.array(sorted(records), dtype=BOOK_DTYPE)
+        np.save(path, entries)
+        return len(entries)
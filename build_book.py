@@ -0,0 +1,45 @@
+import argparse
+from game import OmokGame
+from book import OpeningBookBuilder, DEFAULT_BOOK_PATH
+from records import RecordReader
+from selfplay import run_matches
+
+def main():
+    parser = argparse.ArgumentParser(description="Build an Omok opening book from self-play games.")
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--plies', type=int, default=12, help="book depth in moves")
+    parser.add_argument('--time-limit', type=float, default=1.0, help="seconds per AI move")
+    parser.add_argument('--random-plies', type=int, default=3, help="random opening moves per game")
+    parser.add_argument('--max-moves', type=int, default=120, help="moves before a game is scored a draw")
+    parser.add_argument('--min-games', type=int, default=1, help="games a position needs to enter the book")
+    parser.add_argument('--size', type=int, default=19)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=DEFAULT_BOOK_PATH)
+    parser.add_argument('--records', help="build from the five-in-a-row games of this record file instead of self-play")
+    args = parser.parse_args()
+
+    builder = OpeningBookBuilder(plies=args.plies)
+    if args.records:
+        reader = RecordReader(args.records)
+        games = 0
+        for index in range(len(reader)):
+            header, moves = reader[index]
+            if header['win_length'] != 5:
+                continue
+            builder.add_game(OmokGame, int(header['size']), moves.tolist(), reader.winner(index))
+            games += 1
+    else:
+        # the players must not read the book being built
+        options = {'time_limit': args.time_limit, 'book_path': None}
+        results = run_matches(args.games, options, options, workers=args.workers, size=args.size,
+                              max_moves=args.max_moves, random_plies=args.random_plies, seed=args.seed)
+        for result in results:
+            moves = [(move[0], move[1]) for move in result['moves']]
+            builder.add_game(OmokGame, args.size, moves, result['winner'])
+        games = len(results)
+    count = builder.save(args.output, args.min_games)
+    print(f"{games} games, wrote {count} positions to {args.output}")
+
+if __name__ == "__main__":
+    main()
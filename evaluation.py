@@ -0,0 +1,260 @@
+import json
+import os
+import numpy as np
+
+# pattern scores keyed by (run length, open ends); the first matching entry wins
+PATTERNS = {
+    (5, 0): 1000000,
+    (4, 2): 100000,
+    (4, 1): 50000,
+    (3, 2): 10000,
+    (3, 1): 2000,
+    (2, 2): 1000,
+    (2, 1): 100,
+    (1, 2): 50,
+    (1, 1): 10
+}
+
+# PATTERNS rescaled to another win length: a run scores like the five-in-a-row run the same
+# number of stones short of a win, and runs further away than a single stone score like one
+def default_patterns(win_length=5):
+    patterns = {(win_length, 0): PATTERNS[(5, 0)]}
+    for length in range(win_length - 1, 0, -1):
+        equivalent = max(1, length + 5 - win_length)
+        for open_ends in (2, 1):
+            patterns[(length, open_ends)] = PATTERNS[(equivalent, open_ends)]
+    return patterns
+
+# weights file written by tuning.py, loaded by OmokAI when present
+DEFAULT_WEIGHTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'weights.json')
+
+# writes tuned pattern scores for one win length as JSON, keeping the first-match order of the entries
+def save_weights(path, patterns, win_length=5, **info):
+    data = dict(info, win_length=win_length, patterns=[[l, o, int(val)] for (l, o), val in patterns.items()])
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+
+# (win_length, patterns) from a weights file, or None when there is no file
+def load_weights(path):
+    if not path or not os.path.exists(path):
+        return None
+    with open(path) as f:
+        data = json.load(f)
+    return data['win_length'], {(l, o): val for l, o, val in data['patterns']}
+
+# evaluate_move scores for completing a win, a four with an open end and an open three, taken
+# from the patterns so tuned weights reach move ordering too; PATTERNS gives 1000000, 50000 and 10000
+def move_weights(patterns, win_length=5):
+    return (pattern_value(patterns, win_length, 0), pattern_value(patterns, win_length - 1, 1),
+            pattern_value(patterns, win_length - 2, 2))
+
+LINE_TABLES = {}
+
+# looks up the score of a run the same way OmokAI.evaluate walks the patterns table
+def pattern_value(patterns, length, open_ends):
+    for (l, o), val in patterns.items():
+        if length >= l and open_ends >= o:
+            return val
+    return 0
+
+# precomputes pattern_value for every (length, open ends); longer runs share the longest row
+def pattern_table(patterns):
+    max_length = max(l for l, o in patterns)
+    return [[pattern_value(patterns, length, open_ends) for open_ends in range(3)]
+            for length in range(max_length + 1)]
+
+# like pattern_table, but holds the position of the matching entry in patterns (len(patterns) for none)
+def pattern_index(patterns):
+    keys = list(patterns)
+    max_length = max(l for l, o in keys)
+
+    def first(length, open_ends):
+        return next((i for i, (l, o) in enumerate(keys) if length >= l and open_ends >= o), len(keys))
+    return [[first(length, open_ends) for open_ends in range(3)] for length in range(max_length + 1)]
+
+# returns every row, column and diagonal as a list of cells, and the line ids through each cell
+def board_lines(size):
+    if size not in LINE_TABLES:
+        lines = [[(r, c) for c in range(size)] for r in range(size)]
+        lines += [[(r, c) for r in range(size)] for c in range(size)]
+        for d in range(-(size - 1), size):
+            lines.append([(r, r - d) for r in range(size) if 0 <= r - d < size])
+        for s in range(2 * size - 1):
+            lines.append([(r, s - r) for r in range(size) if 0 <= s - r < size])
+        cell_lines = [[[] for _ in range(size)] for _ in range(size)]
+        for line_id, cells in enumerate(lines):
+            for r, c in cells:
+                cell_lines[r][c].append(line_id)
+        coords = [(np.array([r for r, c in cells]), np.array([c for r, c in cells])) for cells in lines]
+        LINE_TABLES[size] = (lines, coords, cell_lines)
+    return LINE_TABLES[size]
+
+# sums length * pattern score of every maximal run in one line, per player
+def score_line(values, table):
+    scores = [0, 0, 0]
+    max_length = len(table) - 1
+    n = len(values)
+    i = 0
+    while i < n:
+        player = values[i]
+        if player == 0:
+            i += 1
+            continue
+        j = i + 1
+        while j < n and values[j] == player:
+            j += 1
+        length = j - i
+        open_ends = (i > 0 and values[i - 1] == 0) + (j < n and values[j] == 0)
+        scores[player] += length * table[min(length, max_length)][open_ends]
+        i = j
+    return scores
+
+class IncrementalEvaluator:
+    # keeps per-line pattern scores for a game and rescans only the four lines through each changed cell
+    def __init__(self, game, patterns=PATTERNS):
+        self.game = game
+        self.patterns = patterns
+        self.table = pattern_table(patterns)
+        self.lines, self.coords, self.cell_lines = board_lines(game.size)
+        self.line_scores = []
+        self.totals = [0, 0, 0]
+        for line_id in range(len(self.lines)):
+            scores = self.scan(line_id)
+            self.line_scores.append(scores)
+            self.totals[1] += scores[1]
+            self.totals[2] += scores[2]
+        game.listeners.append(self)
+
+    def scan(self, line_id):
+        rows, cols = self.coords[line_id]
+        return score_line(self.game.line_values(rows, cols), self.table)
+
+    # called by OmokGame after a stone is placed on or removed from (row, col)
+    def update(self, row, col):
+        for line_id in self.cell_lines[row][col]:
+            old = self.line_scores[line_id]
+            new = self.scan(line_id)
+            self.totals[1] += new[1] - old[1]
+            self.totals[2] += new[2] - old[2]
+            self.line_scores[line_id] = new
+
+    # same value as OmokAI.evaluate: player's pattern score minus the opponent's
+    def score(self, player):
+        return self.totals[player] - self.totals[3 - player]
+
+    def detach(self):
+        if self in self.game.listeners:
+            self.game.listeners.remove(self)
+
+LINE_INDEX = {}
+
+# flat board indices of every line, padded on both ends with a sentinel cell that reads as a border
+def line_index(size):
+    if size not in LINE_INDEX:
+        lines = board_lines(size)[0]
+        index = np.full((len(lines), size + 2), size * size)
+        for line_id, cells in enumerate(lines):
+            index[line_id, 1:len(cells) + 1] = [r * size + c for r, c in cells]
+        LINE_INDEX[size] = index
+    return LINE_INDEX[size]
+
+# gathers all rows, columns and diagonals of one board (size, size) or a stack of boards (n, size, size)
+def board_line_values(boards):
+    boards = np.asarray(boards)
+    size = boards.shape[-1]
+    flat = boards.reshape(boards.shape[:-2] + (size * size,))
+    border = np.full(flat.shape[:-1] + (1,), 3, dtype=flat.dtype)
+    return np.concatenate([flat, border], axis=-1)[..., line_index(size)]
+
+# every maximal run of player stones in the gathered lines: the index of the cell before each run
+# (its first entry is the board for a stack of boards), and the run's length and open ends
+def line_runs(lines, player):
+    # +1/-1 steps of the [1, -1] difference filter mark where runs start and stop
+    edges = np.diff((lines == player).astype(np.int8), axis=-1)
+    starts = np.nonzero(edges == 1)
+    ends = np.nonzero(edges == -1)
+    length = ends[-1] - starts[-1]
+    before = lines[starts]
+    after = lines[ends[:-1] + (ends[-1] + 1,)]
+    open_ends = (before == 0).astype(np.int64) + (after == 0)
+    return starts, length, open_ends
+
+# pattern totals of players 1 and 2 for one board or a stack of boards, in one batched pass
+def vectorized_totals(boards, table):
+    lines = board_line_values(boards)
+    table = np.asarray(table)
+    max_length = len(table) - 1
+    totals = []
+    for player in (1, 2):
+        starts, length, open_ends = line_runs(lines, player)
+        values = length * table[np.minimum(length, max_length), open_ends]
+        if lines.ndim == 2:
+            totals.append(int(values.sum()))
+        else:
+            per_board = np.zeros(lines.shape[0], dtype=np.int64)
+            np.add.at(per_board, starts[0], values)
+            totals.append(per_board)
+    return totals
+
+# features for fitting pattern weights on a stack of boards (n, size, size): for each player, board and
+# entry of patterns, the summed length of the runs that entry scores, so that
+# features @ list(patterns.values()) equals vectorized_totals; shape (2, n, len(patterns))
+def pattern_features(boards, patterns):
+    lines = board_line_values(boards)
+    index = np.asarray(pattern_index(patterns))
+    max_length = len(index) - 1
+    features = np.zeros((2, lines.shape[0], len(patterns) + 1), dtype=np.int64)
+    for player in (1, 2):
+        starts, length, open_ends = line_runs(lines, player)
+        np.add.at(features[player - 1], (starts[0], index[np.minimum(length, max_length), open_ends]), length)
+    return features[..., :-1]
+
+# same value as OmokAI.evaluate for player, computed without Python loops over the board
+def vectorized_score(board, player, table):
+    totals = vectorized_totals(board, table)
+    return totals[player - 1] - totals[2 - player]
+
+MOVE_OFFSETS = {}
+
+# offsets of the reach cells on each side of a move in every direction: shape (4 directions, 2 sides, reach steps, 2)
+def move_offsets(reach):
+    if reach not in MOVE_OFFSETS:
+        MOVE_OFFSETS[reach] = np.array([[[(dr * i * side, dc * i * side) for i in range(1, reach + 1)]
+                                         for side in (1, -1)] for dr, dc in [(1, 0), (0, 1), (1, 1), (1, -1)]])
+    return MOVE_OFFSETS[reach]
+
+# OmokAI.evaluate_move for many empty cells at once: the run of player stones through each cell in
+# every direction, cut at the first empty cell (an open end), opponent stone or border
+# weights are the (win, four, open three) scores of move_weights
+def batch_move_scores(board, moves, player, win_length=5, weights=(1000000, 50000, 10000)):
+    board = np.asarray(board)
+    size = board.shape[0]
+    reach = win_length - 1
+    moves = np.asarray(moves).reshape(-1, 2)
+    padded = np.pad(board, reach, constant_values=3)
+    cells = moves[:, None, None, None, :] + move_offsets(reach) + reach
+    values = padded[cells[..., 0], cells[..., 1]]
+    own = values == player
+    run = np.cumprod(own, axis=-1).sum(axis=-1)
+    # the cell just past the run, when the run stops before reach steps
+    stop = np.take_along_axis(values, np.minimum(run, reach - 1)[..., None], axis=-1)[..., 0]
+    open_ends = ((run < reach) & (stop == 0)).sum(axis=-1)
+    count = 1 + run.sum(axis=-1)
+    win, four, three = weights
+    line_scores = np.where(count >= win_length, win,
+                  np.where((count == win_length - 1) & (open_ends >= 1), four,
+                  np.where((count == win_length - 2) & (count >= 2) & (open_ends == 2), three,
+                           count ** 2 * (open_ends + 1))))
+    center = size // 2
+    dist = np.maximum(np.abs(moves[:, 0] - center), np.abs(moves[:, 1] - center))
+    return size - dist + line_scores.sum(axis=-1)
+
+# static score for player of each position reached by playing one of moves for mover, from a
+# stacked (n, size, size) tensor of the child boards
+def batch_child_scores(board, moves, mover, player, table):
+    board = np.asarray(board)
+    moves = np.asarray(moves).reshape(-1, 2)
+    boards = np.repeat(board[None], len(moves), axis=0)
+    boards[np.arange(len(moves)), moves[:, 0], moves[:, 1]] = mover
+    totals = vectorized_totals(boards, table)
+    return totals[player - 1] - totals[2 - player]
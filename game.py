@@ -1,50 +1,313 @@
+import random
 import numpy as np
 
+# board size and win length of the supported m,n,k variants
+VARIANTS = {
+    'omok': (19, 5),
+    'gomoku': (15, 5),
+    'tictactoe': (3, 3),
+}
+
+# random 64-bit keys per (player, cell) for zobrist hashing, shared by all games of the same size
+ZOBRIST_KEYS = {}
+ZOBRIST_SIDE = random.Random(0).getrandbits(64)
+
+def zobrist_keys(size):
+    if size not in ZOBRIST_KEYS:
+        rng = random.Random(size)
+        ZOBRIST_KEYS[size] = (
+            (),
+            tuple(rng.getrandbits(64) for _ in range(size * size)),
+            tuple(rng.getrandbits(64) for _ in range(size * size)),
+        )
+    return ZOBRIST_KEYS[size]
+
+# the 8 symmetries of a square board: 4 rotations, then the same rotations after a transpose
+SYMMETRIES = 8
+
+def transform_cell(row, col, symmetry, size):
+    if symmetry & 4:
+        row, col = col, row
+    for _ in range(symmetry & 3):
+        row, col = col, size - 1 - row
+    return row, col
+
+# symmetry that undoes transform_cell(..., symmetry, ...)
+def inverse_symmetry(symmetry):
+    if symmetry & 4:
+        return symmetry
+    return (4 - symmetry) & 3
+
+SYMMETRY_KEYS = {}
+
+# zobrist keys seen through each symmetry: SYMMETRY_KEYS[size][symmetry][player][cell]
+def symmetry_keys(size):
+    if size not in SYMMETRY_KEYS:
+        zobrist = zobrist_keys(size)
+        tables = []
+        for symmetry in range(SYMMETRIES):
+            cells = [transform_cell(r, c, symmetry, size) for r in range(size) for c in range(size)]
+            tables.append(((),) + tuple(tuple(zobrist[player][r * size + c] for r, c in cells)
+                                        for player in (1, 2)))
+        SYMMETRY_KEYS[size] = tuple(tables)
+    return SYMMETRY_KEYS[size]
+
+WIN_LINES = {}
+
+# flat cell indices of every win_length segment on the board, one row per segment
+def win_lines(size, win_length):
+    if (size, win_length) not in WIN_LINES:
+        lines = []
+        for dr, dc in [(1, 0), (0, 1), (1, 1), (1, -1)]:
+            for row in range(size):
+                for col in range(size):
+                    cells = [(row + dr * i, col + dc * i) for i in range(win_length)]
+                    if all(0 <= r < size and 0 <= c < size for r, c in cells):
+                        lines.append([r * size + c for r, c in cells])
+        WIN_LINES[size, win_length] = np.array(lines, dtype=int).reshape(-1, win_length)
+    return WIN_LINES[size, win_length]
+
+BITBOARD_MASKS = {}
+
+# for each direction and cell, the bits where a winning run covering that cell can start
+def bitboard_masks(size, win_length=5):
+    if (size, win_length) not in BITBOARD_MASKS:
+        stride = size + 1
+        masks = []
+        for dr, dc in [(1, 0), (0, 1), (1, 1), (1, -1)]:
+            cell_masks = []
+            for row in range(size):
+                for col in range(size):
+                    mask = 0
+                    for i in range(win_length):
+                        r, c = row - dr * i, col - dc * i
+                        if 0 <= r < size and 0 <= c < size:
+                            mask |= 1 << (r * stride + c)
+                    cell_masks.append(mask)
+            masks.append((dr * stride + dc, tuple(cell_masks)))
+        BITBOARD_MASKS[size, win_length] = tuple(masks)
+    return BITBOARD_MASKS[size, win_length]
+
+class BitBoard:
+    # one Python int per player; cell (row, col) is bit row * (size + 1) + col, so the
+    # always-empty extra column stops horizontal and diagonal shifts wrapping between rows
+    def __init__(self, size, win_length=5):
+        self.size = size
+        self.win_length = win_length
+        self.shape = (size, size)
+        self.stride = size + 1
+        self.bits = [0, 0, 0]
+        self.masks = bitboard_masks(size, win_length)
+
+    def get(self, row, col):
+        pos = row * self.stride + col
+        return (self.bits[1] >> pos & 1) | (self.bits[2] >> pos & 1) << 1
+
+    def set(self, row, col, value):
+        bit = 1 << (row * self.stride + col)
+        self.bits[1] &= ~bit
+        self.bits[2] &= ~bit
+        if value:
+            self.bits[value] |= bit
+
+    # supports both board[row, col] and board[row][col] like the NumPy board
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            return self.get(*key)
+        return BitBoardRow(self, key)
+
+    def __setitem__(self, key, value):
+        self.set(*key, value)
+
+    def __len__(self):
+        return self.size
+
+    # values of the given cells, in order
+    def values(self, rows, cols):
+        one, two, stride = self.bits[1], self.bits[2], self.stride
+        return [(one >> (r * stride + c) & 1) | (two >> (r * stride + c) & 1) << 1
+                for r, c in zip(rows, cols)]
+
+    def tolist(self):
+        return [[self.get(r, c) for c in range(self.size)] for r in range(self.size)]
+
+    # lets np.asarray(board) and the vectorized evaluator read a bitboard
+    def __array__(self, dtype=None, copy=None):
+        return np.array(self.tolist(), dtype=dtype if dtype is not None else int)
+
+    # shares the precomputed masks instead of copying them
+    def __deepcopy__(self, memo):
+        board = BitBoard.__new__(BitBoard)
+        board.__dict__.update(self.__dict__)
+        board.bits = list(self.bits)
+        return board
+
+    # win_length or more in a row through (row, col) using shift-and in all four directions
+    def check_win(self, row, col):
+        player = self.get(row, col)
+        if player == 0:
+            return False
+        bits = self.bits[player]
+        cell = row * self.size + col
+        for shift, cell_masks in self.masks:
+            starts = bits
+            for i in range(1, self.win_length):
+                starts &= bits >> (shift * i)
+            if starts & cell_masks[cell]:
+                return True
+        return False
+
+class BitBoardRow:
+    def __init__(self, board, row):
+        self.board = board
+        self.row = row
+
+    def __getitem__(self, col):
+        return self.board.get(self.row, col)
+
+    def __setitem__(self, col, value):
+        self.board.set(self.row, col, value)
+
 class OmokGame:
     # initializes Omok game board
-    def __init__(self, size=19):
+    # backend 'numpy' stores the board as an int array, 'bitboard' as per-player Python int bitboards
+    # win_length stones in a row win, so the same game plays gomoku variants and tic-tac-toe
+    def __init__(self, size=19, backend='numpy', win_length=5):
         self.size = size
-        self.board = np.zeros((size, size), dtype=int)
+        self.win_length = win_length
+        self.backend = backend
+        if backend == 'bitboard':
+            self.board = BitBoard(size, win_length)
+        else:
+            self.board = np.zeros((size, size), dtype=int)
         self.current_player = 1
         self.last_move = None
         self.winner = None
         self.directions = [(1, 0), (0, 1), (1, 1), (1, -1)]
         self.move_history = []
+        self.winner_history = []
+        # position hash including side to move, updated incrementally on make/undo
+        self.zobrist = zobrist_keys(size)
+        self.hash = 0
+        # hash of the board under each of the 8 symmetries (index 0 equals hash), for canonical lookups
+        self.symmetry_keys = symmetry_keys(size)
+        self.symmetry_hashes = [0] * SYMMETRIES
+        # empty cells within two steps of a stone, with how many stones are near each cell
+        self.neighbour_counts = [[0] * size for _ in range(size)]
+        self.candidates = set()
+        # objects with an update(row, col) method, told about every stone placed or removed
+        self.listeners = []
 
     # places stone for current player
     def make_move(self, row, col):
-        if self.board[row][col] != 0:
+        if self.board[row, col] != 0:
             return False
-        self.board[row][col] = self.current_player
+        self.board[row, col] = self.current_player
+        self.hash ^= self.zobrist[self.current_player][row * self.size + col] ^ ZOBRIST_SIDE
+        self.update_symmetry_hashes(row, col)
+        self.add_neighbours(row, col)
+        for listener in self.listeners:
+            listener.update(row, col)
         # updates last_move and appends to move_history
         self.last_move = (row, col)
         self.move_history.append((row, col))
+        self.winner_history.append(self.winner)
         if self.check_win(row, col):
             self.winner = self.current_player
         # switches to next player
         self.current_player = 3 - self.current_player
         return True
 
-    # checks all 4 directions for line of 5 or more
+    # takes back the most recent move and restores the previous game state
+    def undo_move(self):
+        if not self.move_history:
+            return False
+        row, col = self.move_history.pop()
+        self.board[row, col] = 0
+        self.remove_neighbours(row, col)
+        for listener in self.listeners:
+            listener.update(row, col)
+        self.winner = self.winner_history.pop()
+        self.last_move = self.move_history[-1] if self.move_history else None
+        self.current_player = 3 - self.current_player
+        self.hash ^= self.zobrist[self.current_player][row * self.size + col] ^ ZOBRIST_SIDE
+        self.update_symmetry_hashes(row, col)
+        return True
+
+    # passes the turn without placing a stone, for null-move pruning; undo_null_move reverses it
+    def make_null_move(self):
+        self.current_player = 3 - self.current_player
+        self.hash ^= ZOBRIST_SIDE
+        hashes = self.symmetry_hashes
+        for symmetry in range(SYMMETRIES):
+            hashes[symmetry] ^= ZOBRIST_SIDE
+
+    def undo_null_move(self):
+        self.make_null_move()
+
+    # toggles the current player's stone at (row, col) and the side to move in all symmetry hashes
+    def update_symmetry_hashes(self, row, col):
+        cell = row * self.size + col
+        player = self.current_player
+        hashes = self.symmetry_hashes
+        for symmetry, keys in enumerate(self.symmetry_keys):
+            hashes[symmetry] ^= keys[player][cell] ^ ZOBRIST_SIDE
+
+    # smallest hash over the 8 symmetries, and the symmetry that maps the board onto that canonical form
+    def canonical_hash(self):
+        key = min(self.symmetry_hashes)
+        return key, self.symmetry_hashes.index(key)
+
+    # counts a new stone at (row, col) for the 5x5 neighbourhood around it
+    def add_neighbours(self, row, col):
+        self.candidates.discard((row, col))
+        counts = self.neighbour_counts
+        for r in range(max(0, row - 2), min(self.size, row + 3)):
+            for c in range(max(0, col - 2), min(self.size, col + 3)):
+                counts[r][c] += 1
+                if counts[r][c] == 1 and self.board[r, c] == 0:
+                    self.candidates.add((r, c))
+
+    # reverses add_neighbours after the stone at (row, col) is removed
+    def remove_neighbours(self, row, col):
+        counts = self.neighbour_counts
+        for r in range(max(0, row - 2), min(self.size, row + 3)):
+            for c in range(max(0, col - 2), min(self.size, col + 3)):
+                counts[r][c] -= 1
+                if counts[r][c] == 0:
+                    self.candidates.discard((r, c))
+        if counts[row][col] > 0:
+            self.candidates.add((row, col))
+
+    # values of the cells at the given coordinates, as a list of ints
+    def line_values(self, rows, cols):
+        if self.backend == 'bitboard':
+            return self.board.values(rows.tolist(), cols.tolist())
+        return self.board[rows, cols].tolist()
+
+    # checks all 4 directions for a line of win_length or more
     def check_win(self, row, col):
-        player = self.board[row][col]
+        if self.backend == 'bitboard':
+            return self.board.check_win(row, col)
+        player = self.board[row, col]
+        reach = self.win_length
         for dr, dc in self.directions:
             count = 1
-            for i in range(1, 5):
+            for i in range(1, reach):
                 r, c = row + dr*i, col + dc*i
-                if 0 <= r < self.size and 0 <= c < self.size and self.board[r][c] == player:
+                if 0 <= r < self.size and 0 <= c < self.size and self.board[r, c] == player:
                     count += 1
                 else:
                     break
-            for i in range(1, 5):
+            for i in range(1, reach):
                 r, c = row - dr*i, col - dc*i
-                if 0 <= r < self.size and 0 <= c < self.size and self.board[r][c] == player:
+                if 0 <= r < self.size and 0 <= c < self.size and self.board[r, c] == player:
                     count += 1
                 else:
                     break
-            if count >= 5:
+            if count >= reach:
                 return True
         return False
 
     def is_terminal(self):
-        return self.winner is not None or np.all(self.board != 0)
+        return self.winner is not None or len(self.move_history) == self.size * self.size
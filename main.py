@@ -1,13 +1,24 @@
-from game import OmokGame
+import argparse
+from game import OmokGame, VARIANTS
 from ai import OmokAI
+from records import RecordWriter
 from utils import coordinate_to_tuple, tuple_to_coordinate, print_board
 
 def main():
+    parser = argparse.ArgumentParser(description="Play Omok against the AI.")
+    parser.add_argument('--time-limit', type=float, default=10, help="seconds per AI move")
+    parser.add_argument('--ponder', action='store_true', help="let the AI think while you choose your move")
+    parser.add_argument('--variant', choices=sorted(VARIANTS), default='omok', help="board size and win length")
+    parser.add_argument('--record', help="append the finished game to this record file")
+    args = parser.parse_args()
+
+    size, win_length = VARIANTS[args.variant]
     print("Omok Game - Iterative Deepening Heuristic Alpha-Beta Search")
+    print(f"{size}x{size} board, {win_length} in a row wins.")
     print("Black (○) moves first. White (●) is the AI.")
 
-    game = OmokGame()
-    ai = OmokAI(player=2, time_limit=10)  
+    game = OmokGame(size, win_length=win_length)
+    ai = OmokAI(player=2, time_limit=args.time_limit)
 
     # when game is not end yet
     while not game.is_terminal():
@@ -15,8 +26,8 @@ def main():
 
         if game.current_player == 1:
             while True:
-                move_input = input("Your move (e.g., J10): ").strip()
-                move = coordinate_to_tuple(move_input)
+                move_input = input(f"Your move (e.g., {tuple_to_coordinate((size // 2, size // 2))}): ").strip()
+                move = coordinate_to_tuple(move_input, size)
                 if move and game.board[move[0]][move[1]] == 0:
                     print("")
                     break
@@ -27,6 +38,14 @@ def main():
             print(f"AI plays: {tuple_to_coordinate(move)}\n")
 
         game.make_move(*move)
+        # searches the expected human reply in the background; a hit makes the next AI move near instant
+        if args.ponder and game.current_player == 1 and not game.is_terminal():
+            ai.ponder(game)
+
+    ai.close()
+    if args.record:
+        with RecordWriter(args.record) as writer:
+            writer.write_game(game)
 
     print_board(game)
     if game.winner:
@@ -0,0 +1,124 @@
+import os
+import time
+import numpy as np
+from game import OmokGame
+
+# binary game records: the file starts with RECORD_MAGIC, then every game is one GAME_DTYPE header
+# followed by `plies` moves, each stored as the cell index row * size + col
+RECORD_MAGIC = b'OMKREC01'
+GAME_DTYPE = np.dtype([('size', 'u1'), ('win_length', 'u1'), ('winner', 'u1'), ('flags', 'u1'),
+                       ('plies', '<u2'), ('reserved', '<u2'), ('seed', '<u4'), ('timestamp', '<u4')])
+MOVE_DTYPE = np.dtype('<u2')
+# flags: the game ended on the board (a five or a full board), rather than at a move cap or abort
+FINISHED = 1
+
+class RecordWriter:
+    # appends games to a record file, creating it with the magic header if it is new or empty
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'ab')
+        if self.file.tell() == 0:
+            self.file.write(RECORD_MAGIC)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # writes one game; winner None is a draw or an unfinished game
+    def write(self, size, moves, winner, win_length=5, finished=True, seed=0, timestamp=None):
+        header = np.zeros(1, dtype=GAME_DTYPE)
+        header['size'] = size
+        header['win_length'] = win_length
+        header['winner'] = winner or 0
+        header['flags'] = FINISHED if finished else 0
+        header['plies'] = len(moves)
+        header['seed'] = seed
+        header['timestamp'] = int(time.time()) if timestamp is None else timestamp
+        cells = np.array([row * size + col for row, col in moves], dtype=MOVE_DTYPE)
+        self.file.write(header.tobytes())
+        self.file.write(cells.tobytes())
+
+    def write_game(self, game, seed=0):
+        self.write(game.size, game.move_history, game.winner, game.win_length, game.is_terminal(), seed)
+
+    # writes one self-play result as returned by selfplay.play_game
+    def write_result(self, result):
+        moves = [(move[0], move[1]) for move in result['moves']]
+        finished = result['winner'] is not None or len(moves) == result['size'] ** 2
+        self.write(result['size'], moves, result['winner'], result.get('win_length', 5), finished,
+                   seed=result['game'])
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+class RecordReader:
+    # memory-maps a record file; games are read in place, so only the index of game offsets is held in memory
+    # offsets, a slice of another reader's offsets, skips indexing and reads just those games
+    def __init__(self, path, offsets=None):
+        self.path = path
+        self.data = np.zeros(0, dtype=np.uint8)
+        if os.path.getsize(path) > len(RECORD_MAGIC):
+            self.data = np.memmap(path, dtype=np.uint8, mode='r')
+        if len(self.data) and bytes(self.data[:len(RECORD_MAGIC)]) != RECORD_MAGIC:
+            raise ValueError(f"{path} is not a game record file")
+        self.offsets = self.index() if offsets is None else np.asarray(offsets, dtype=np.int64)
+
+    # byte offset of every game header, found by hopping from header to header
+    def index(self):
+        offsets = []
+        plies_at = GAME_DTYPE.fields['plies'][1]
+        offset, end = len(RECORD_MAGIC), len(self.data)
+        while offset + GAME_DTYPE.itemsize <= end:
+            offsets.append(offset)
+            plies = int(self.data[offset + plies_at]) | int(self.data[offset + plies_at + 1]) << 8
+            offset += GAME_DTYPE.itemsize + plies * MOVE_DTYPE.itemsize
+        if offset > end and offsets:
+            # a writer was interrupted in the middle of the last game
+            offsets.pop()
+        return np.array(offsets, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def header(self, index):
+        offset = int(self.offsets[index])
+        return self.data[offset:offset + GAME_DTYPE.itemsize].view(GAME_DTYPE)[0]
+
+    # moves of a game as an (plies, 2) array of rows and columns
+    def moves(self, index):
+        header = self.header(index)
+        start = int(self.offsets[index]) + GAME_DTYPE.itemsize
+        cells = self.data[start:start + int(header['plies']) * MOVE_DTYPE.itemsize].view(MOVE_DTYPE)
+        size = int(header['size'])
+        return np.stack([cells // size, cells % size], axis=1).astype(int)
+
+    def __getitem__(self, index):
+        return self.header(index), self.moves(index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    # winner of a game as OmokGame reports it, None for a draw or unfinished game
+    def winner(self, index):
+        return int(self.header(index)['winner']) or None
+
+    # plays a game back onto a fresh OmokGame, up to plies moves if given
+    def replay(self, index, plies=None, backend='numpy'):
+        header, moves = self[index]
+        game = OmokGame(int(header['size']), backend=backend, win_length=int(header['win_length']))
+        for row, col in moves[:plies].tolist():
+            game.make_move(row, col)
+        return game
+
+# converts self-play results (as written by selfplay.run_matches) to a record file
+def write_results(results, path):
+    with RecordWriter(path) as writer:
+        for result in results:
+            writer.write_result(result)
+    return len(results)
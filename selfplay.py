@@ -0,0 +1,108 @@
+import argparse
+import json
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from game import OmokGame, VARIANTS
+from ai import OmokAI
+from records import RecordWriter
+
+# each move in a record is [row, col, seconds, nodes, depth reached]
+MOVE_FIELDS = ['row', 'col', 'seconds', 'nodes', 'depth']
+
+# random empty cell near the stones within three steps of the centre, for varied openings
+def random_opening_move(game, rng):
+    center = game.size // 2
+    if not game.move_history:
+        return center, center
+    moves = [m for m in game.candidates if abs(m[0] - center) <= 3 and abs(m[1] - center) <= 3]
+    return rng.choice(sorted(moves or game.candidates))
+
+# plays one AI-vs-AI game without printing; black and white are OmokAI keyword options
+def play_game(index, black, white, size=19, max_moves=None, random_plies=0, seed=0, win_length=5):
+    rng = random.Random(seed * 1000003 + index)
+    game = OmokGame(size, win_length=win_length)
+    players = {1: OmokAI(1, **black), 2: OmokAI(2, **white)}
+    moves = []
+    while not game.is_terminal() and (max_moves is None or len(game.move_history) < max_moves):
+        ai = players[game.current_player]
+        start = time.perf_counter()
+        if len(game.move_history) < random_plies:
+            move = random_opening_move(game, rng)
+            nodes, depth = 0, 0
+        else:
+            move, stats = ai.search(game)
+            nodes, depth = stats.nodes, stats.depth
+        moves.append([move[0], move[1], round(time.perf_counter() - start, 4), nodes, depth])
+        game.make_move(*move)
+    for ai in players.values():
+        ai.close()
+    return {'game': index, 'size': size, 'win_length': win_length, 'winner': game.winner, 'plies': len(moves),
+            'black': black, 'white': white, 'moves': moves}
+
+# plays many games across a process pool and appends one compact JSON line per game to output,
+# and one binary game record per game to records
+def run_matches(games, black, white, workers=1, output=None, records=None, **options):
+    results = []
+    out = open(output, 'a') if output else None
+    writer = RecordWriter(records) if records else None
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(play_game, i, black, white, **options) for i in range(games)]
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                if out:
+                    out.write(json.dumps(result, separators=(',', ':')) + '\n')
+                    out.flush()
+                if writer:
+                    writer.write_result(result)
+                    writer.flush()
+    finally:
+        if out:
+            out.close()
+        if writer:
+            writer.close()
+    return sorted(results, key=lambda result: result['game'])
+
+# reads records written by run_matches
+def load_results(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def side_options(time_limit, depth, clock=None, increment=0.0):
+    return {'time_limit': time_limit, 'max_depth': depth, 'clock': clock, 'increment': increment, 'book_path': None}
+
+def main():
+    parser = argparse.ArgumentParser(description="Play headless OmokAI self-play matches.")
+    parser.add_argument('--games', type=int, default=10)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--black-time', type=float, default=1.0, help="seconds per move for black")
+    parser.add_argument('--white-time', type=float, default=1.0, help="seconds per move for white")
+    parser.add_argument('--black-clock', type=float, default=None, help="seconds on black's game clock, replaces --black-time")
+    parser.add_argument('--white-clock', type=float, default=None, help="seconds on white's game clock, replaces --white-time")
+    parser.add_argument('--increment', type=float, default=0.0, help="seconds added to a game clock after each move")
+    parser.add_argument('--black-depth', type=int, default=None, help="depth cap for black")
+    parser.add_argument('--white-depth', type=int, default=None, help="depth cap for white")
+    parser.add_argument('--variant', choices=sorted(VARIANTS), default=None, help="board size and win length, replaces --size")
+    parser.add_argument('--size', type=int, default=19)
+    parser.add_argument('--max-moves', type=int, default=None, help="moves before a game is scored a draw")
+    parser.add_argument('--random-plies', type=int, default=2, help="random opening moves per game")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='selfplay.jsonl')
+    parser.add_argument('--records', default=None, help="also append binary game records to this file")
+    args = parser.parse_args()
+    size, win_length = VARIANTS[args.variant] if args.variant else (args.size, 5)
+
+    results = run_matches(args.games, side_options(args.black_time, args.black_depth, args.black_clock, args.increment),
+                          side_options(args.white_time, args.white_depth, args.white_clock, args.increment),
+                          workers=args.workers,
+                          output=args.output, records=args.records, size=size, win_length=win_length,
+                          max_moves=args.max_moves, random_plies=args.random_plies, seed=args.seed)
+    wins = {1: 0, 2: 0, None: 0}
+    for result in results:
+        wins[result['winner']] += 1
+    print(f"{len(results)} games: black {wins[1]}, white {wins[2]}, draws {wins[None]} -> {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+import argparse
+import asyncio
+import itertools
+import json
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
+from game import OmokGame
+from ai import OmokAI
+
+# JSON-lines protocol: every request is one object with an "id" and a "cmd", and every reply
+# echoes the id. Commands:
+#   new     {size, win_length, options}   -> {type: session, session}  (options are OmokAI keywords;
+#                                            with workers > 1 cancel and timeout stop the worker processes too)
+#   move    {session, move: [row, col]}   -> {type: state, ...}
+#   undo    {session}                     -> {type: state, ...}
+#   state   {session}                     -> {type: state, ...}
+#   search  {session, play, time_limit, clock, increment, timeout}
+#                                         -> {type: iteration, ...} per finished depth, then {type: result, ...}
+#   cancel  {request}                     -> {type: ok}; the search replies with its best move so far
+#   close   {session}                     -> {type: ok}
+
+DEFAULT_PORT = 8765
+
+class Session:
+    # one game and the AIs playing in it, created lazily for each side they search for
+    def __init__(self, size, options, win_length=5):
+        self.game = OmokGame(size, win_length=win_length)
+        self.options = options
+        self.ais = {}
+        self.search_id = None
+
+    def ai(self, player):
+        if player not in self.ais:
+            self.ais[player] = OmokAI(player, **self.options)
+        return self.ais[player]
+
+    def state(self):
+        game = self.game
+        return {
+            'type': 'state',
+            'size': game.size,
+            'win_length': game.win_length,
+            'moves': [list(move) for move in game.move_history],
+            'current_player': game.current_player,
+            'winner': game.winner,
+            'terminal': game.is_terminal(),
+        }
+
+    def close(self):
+        for ai in self.ais.values():
+            ai.close()
+
+class OmokServer:
+    # hosts game sessions for local clients; searches run on a thread pool so the event loop
+    # keeps serving other sessions, cancels and timeouts while they think
+    def __init__(self, host='127.0.0.1', port=DEFAULT_PORT, workers=4):
+        self.host = host
+        self.port = port
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.sessions = {}
+        self.session_ids = itertools.count(1)
+        self.server = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle_client, self.host, self.port)
+        # port 0 picks a free port, so report the real one
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self.server
+
+    async def serve_forever(self):
+        if self.server is None:
+            await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        for session in self.sessions.values():
+            session.close()
+        self.sessions.clear()
+        self.executor.shutdown(wait=False)
+
+    # one connection: reads requests line by line; searches run as tasks so cancel can arrive meanwhile
+    async def handle_client(self, reader, writer):
+        searches = {}
+        owned = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    request = None
+                if not isinstance(request, dict):
+                    self.send(writer, {'type': 'error', 'error': 'requests must be JSON objects'})
+                    continue
+                # a bad request gets an error reply; it must not end the connection and its sessions
+                try:
+                    if request.get('cmd') == 'search':
+                        self.start_search(writer, request, searches)
+                        continue
+                    reply = self.dispatch(request, searches, owned)
+                except Exception as e:
+                    reply = {'type': 'error', 'error': e.args[0] if e.args else repr(e)}
+                reply['id'] = request.get('id')
+                self.send(writer, reply)
+                await writer.drain()
+        finally:
+            for _, ai in searches.values():
+                ai.time_manager.stop()
+            for task, _ in list(searches.values()):
+                await asyncio.gather(task, return_exceptions=True)
+            # the server may have closed every session already on shutdown
+            for session_id in owned:
+                session = self.sessions.pop(session_id, None)
+                if session is not None:
+                    session.close()
+            writer.close()
+
+    def send(self, writer, message):
+        if not writer.is_closing():
+            writer.write((json.dumps(message, separators=(',', ':')) + '\n').encode())
+
+    def session(self, request):
+        session_id = request['session']
+        if session_id not in self.sessions:
+            raise KeyError(f"unknown session {session_id}")
+        return self.sessions[session_id]
+
+    # handles every command except search
+    def dispatch(self, request, searches, owned):
+        cmd = request.get('cmd')
+        if cmd == 'new':
+            session_id = next(self.session_ids)
+            self.sessions[session_id] = Session(request.get('size', 19), request.get('options', {}),
+                                                request.get('win_length', 5))
+            owned.add(session_id)
+            return {'type': 'session', 'session': session_id}
+        if cmd == 'cancel':
+            running = searches.get(request.get('request'))
+            if running is None:
+                raise KeyError(f"no running search {request.get('request')}")
+            running[1].time_manager.stop()
+            return {'type': 'ok'}
+        if cmd == 'close':
+            session = self.session(request)
+            if session.search_id is not None:
+                raise ValueError("session is searching")
+            owned.discard(request['session'])
+            self.sessions.pop(request['session']).close()
+            return {'type': 'ok'}
+
+        session = self.session(request)
+        if cmd == 'state':
+            return session.state()
+        if session.search_id is not None:
+            raise ValueError("session is searching")
+        if cmd == 'move':
+            row, col = request['move']
+            if not all(isinstance(value, int) and not isinstance(value, bool) for value in (row, col)):
+                raise ValueError(f"move must be two integers, got {request['move']}")
+            game = session.game
+            if game.is_terminal() or not (0 <= row < game.size and 0 <= col < game.size) or not game.make_move(row, col):
+                raise ValueError(f"illegal move {[row, col]}")
+            return session.state()
+        if cmd == 'undo':
+            session.game.undo_move()
+            return session.state()
+        raise ValueError(f"unknown command {cmd}")
+
+    # marks the session busy before anything else is read, then searches in a task;
+    # searches maps request id -> (task, ai)
+    def start_search(self, writer, request, searches):
+        request_id = request.get('id')
+        session = self.session(request)
+        if session.search_id is not None:
+            raise ValueError("session is searching")
+        if session.game.is_terminal():
+            raise ValueError("game is over")
+        if request_id in searches:
+            raise ValueError(f"request {request_id} is already running")
+        for name in ('time_limit', 'clock', 'increment', 'moves_to_go', 'timeout'):
+            value = request.get(name)
+            if value is not None and (not isinstance(value, (int, float)) or isinstance(value, bool) or value < 0):
+                raise ValueError(f"{name} must be a non-negative number, got {value}")
+        ai = session.ai(session.game.current_player)
+        if 'time_limit' in request:
+            ai.time_manager.time_limit = request['time_limit']
+        if 'clock' in request:
+            ai.time_manager.set_clock(request['clock'], request.get('increment'), request.get('moves_to_go'))
+        session.search_id = request_id
+        task = asyncio.ensure_future(self.search(writer, request, session, ai))
+        searches[request_id] = (task, ai)
+        task.add_done_callback(lambda _: searches.pop(request_id, None))
+
+    # runs one search on the pool, streaming an update per finished depth; timeout stops the
+    # search and returns its best move so far, like cancel; a failed search replies with an error
+    async def search(self, writer, request, session, ai):
+        request_id = request.get('id')
+        game = session.game
+        loop = asyncio.get_running_loop()
+
+        # called on the worker thread, so the update is handed to the event loop
+        def callback(iteration):
+            update = dict(iteration, id=request_id, type='iteration')
+            loop.call_soon_threadsafe(self.send, writer, update)
+
+        timer = None
+        if request.get('timeout') is not None:
+            timer = loop.call_later(request['timeout'], ai.time_manager.stop)
+        try:
+            move, stats = await loop.run_in_executor(self.executor, ai.search, deepcopy(game), callback)
+        except Exception as e:
+            self.send(writer, {'id': request_id, 'type': 'error', 'error': e.args[0] if e.args else repr(e)})
+            return
+        finally:
+            if timer is not None:
+                timer.cancel()
+            stopped = ai.time_manager.stop_event.is_set()
+            ai.time_manager.clear_stop()
+            session.search_id = None
+        if request.get('play') and move is not None and not stopped:
+            game.make_move(*move)
+        self.send(writer, {
+            'id': request_id,
+            'type': 'result',
+            'move': list(move) if move is not None else None,
+            'stopped': stopped,
+            'stats': stats.as_dict(),
+            'state': session.state(),
+        })
+        await writer.drain()
+
+class OmokClient:
+    # minimal client for the JSON-lines protocol, for scripts and local testing
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.ids = itertools.count(1)
+        self.pending = {}
+        self.listener = asyncio.ensure_future(self.listen())
+
+    @classmethod
+    async def connect(cls, host='127.0.0.1', port=DEFAULT_PORT):
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    # routes replies to the request that sent them; iteration updates go to its on_update
+    async def listen(self):
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                break
+            message = json.loads(line)
+            future, on_update = self.pending.get(message.get('id'), (None, None))
+            if future is None:
+                continue
+            if message['type'] == 'iteration':
+                if on_update is not None:
+                    on_update(message)
+            else:
+                self.pending.pop(message['id'])
+                future.set_result(message)
+        for future, _ in self.pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError("server closed the connection"))
+
+    # sends a command and returns its id and a future for the final reply
+    def send(self, cmd, on_update=None, **params):
+        request_id = next(self.ids)
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = (future, on_update)
+        self.writer.write((json.dumps(dict(params, id=request_id, cmd=cmd)) + '\n').encode())
+        return request_id, future
+
+    async def call(self, cmd, on_update=None, **params):
+        _, future = self.send(cmd, on_update, **params)
+        return await future
+
+    async def close(self):
+        for future, _ in self.pending.values():
+            future.cancel()
+        self.writer.close()
+        await self.listener
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve OmokAI over a local JSON-lines socket.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--workers', type=int, default=4, help="searches that can run at once")
+    args = parser.parse_args()
+
+    server = OmokServer(args.host, args.port, args.workers)
+
+    async def run():
+        await server.start()
+        print(f"Omok server listening on {server.host}:{server.port}")
+        await server.serve_forever()
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import time
+
+class SearchStats:
+    # counters for one OmokAI search, filled in while it runs
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.elapsed = 0.0
+        # where the move came from: 'book', 'threat', 'forced', 'search' or 'parallel'
+        self.source = None
+        self.move = None
+        self.depth = 0
+        self.nodes = 0
+        self.interior_nodes = 0
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.killer_cutoffs = 0
+        # principal variation re-searches after a null window failed high, and aspiration window misses
+        self.research_count = 0
+        self.aspiration_failures = 0
+        # late move reductions tried, reduced moves re-searched at full depth, and null-move cutoffs
+        self.reductions = 0
+        self.reduction_researches = 0
+        self.null_cutoffs = 0
+        # nodes searched by the quiescence extension below the depth limit (included in nodes)
+        self.quiescence_nodes = 0
+        self.tt_probes = 0
+        self.tt_hits = 0
+        self.threat_nodes = 0
+        # time budget from the time manager, and the depth of an unfinished iteration whose move was played
+        self.soft_limit = None
+        self.hard_limit = None
+        self.partial_depth = None
+        # the move came from a search started on the opponent's time that predicted their reply
+        self.ponder_hit = False
+        # one entry per finished iteration: depth, move, value, nodes and seconds so far
+        self.iterations = []
+        # seconds spent in hot-path functions, only filled in profile mode
+        self.timings = {}
+
+    def add_iteration(self, depth, move, value, nodes):
+        iteration = {
+            'depth': depth,
+            'move': move,
+            'value': value,
+            'nodes': nodes,
+            'seconds': time.perf_counter() - self.start,
+        }
+        self.iterations.append(iteration)
+        return iteration
+
+    def add_time(self, name, seconds):
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def finish(self, move, nodes):
+        self.move = move
+        self.nodes = nodes
+        self.elapsed = time.perf_counter() - self.start
+
+    @property
+    def nodes_per_second(self):
+        return self.nodes / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def tt_hit_rate(self):
+        return self.tt_hits / self.tt_probes if self.tt_probes else 0.0
+
+    # share of interior nodes that ended in a beta cutoff
+    @property
+    def cutoff_rate(self):
+        return self.cutoffs / self.interior_nodes if self.interior_nodes else 0.0
+
+    # share of cutoffs caused by the first ordered move, a measure of move ordering quality
+    @property
+    def first_move_cutoff_rate(self):
+        return self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0
+
+    # share of cutoffs caused by a killer move
+    @property
+    def killer_cutoff_rate(self):
+        return self.killer_cutoffs / self.cutoffs if self.cutoffs else 0.0
+
+    def as_dict(self):
+        return {
+            'source': self.source,
+            'move': self.move,
+            'depth': self.depth,
+            'nodes': self.nodes,
+            'elapsed': self.elapsed,
+            'nodes_per_second': self.nodes_per_second,
+            'interior_nodes': self.interior_nodes,
+            'cutoffs': self.cutoffs,
+            'cutoff_rate': self.cutoff_rate,
+            'first_move_cutoff_rate': self.first_move_cutoff_rate,
+            'killer_cutoffs': self.killer_cutoffs,
+            'killer_cutoff_rate': self.killer_cutoff_rate,
+            'research_count': self.research_count,
+            'aspiration_failures': self.aspiration_failures,
+            'reductions': self.reductions,
+            'reduction_researches': self.reduction_researches,
+            'null_cutoffs': self.null_cutoffs,
+            'quiescence_nodes': self.quiescence_nodes,
+            'tt_probes': self.tt_probes,
+            'tt_hits': self.tt_hits,
+            'tt_hit_rate': self.tt_hit_rate,
+            'threat_nodes': self.threat_nodes,
+            'soft_limit': self.soft_limit,
+            'hard_limit': self.hard_limit,
+            'partial_depth': self.partial_depth,
+            'ponder_hit': self.ponder_hit,
+            'iterations': self.iterations,
+            'timings': self.timings,
+        }
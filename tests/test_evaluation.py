@@ -0,0 +1,76 @@
+import random
+import pytest
+from game import OmokGame
+from ai import OmokAI
+import numpy as np
+from evaluation import (IncrementalEvaluator, default_patterns, pattern_table, vectorized_score, batch_move_scores,
+                        batch_child_scores)
+
+# a game of random candidate moves on a random size and win length; the first stone goes in the centre
+def random_game(rng, plies, backend='numpy'):
+    game = OmokGame(rng.choice([9, 15, 19]), backend=backend, win_length=rng.choice([3, 4, 5]))
+    for _ in range(plies):
+        cells = sorted(game.candidates) or [(game.size // 2, game.size // 2)]
+        game.make_move(*rng.choice(cells))
+    return game
+
+# plays random candidate moves and takes some back, checking the incremental score against a full
+# rescan with evaluate_loop after every change
+@pytest.mark.parametrize('seed', range(20))
+@pytest.mark.parametrize('player', [1, 2])
+def test_incremental_matches_evaluate_loop(seed, player):
+    rng = random.Random(seed)
+    game = OmokGame(rng.choice([9, 15, 19]))
+    ai = OmokAI(player, book_path=None, weights_path=None, evaluation='loop')
+    evaluator = IncrementalEvaluator(game)
+    for _ in range(60):
+        if game.move_history and rng.random() < 0.3:
+            game.undo_move()
+        else:
+            cells = sorted(game.candidates) or [(game.size // 2, game.size // 2)]
+            game.make_move(*rng.choice(cells))
+        ai.heuristic_cache.clear()
+        assert evaluator.score(player) == ai.evaluate_loop(game)
+    evaluator.detach()
+    assert evaluator not in game.listeners
+
+# the NumPy line scanner must score every position like the Python scan, for any win length
+@pytest.mark.parametrize('seed', range(30))
+def test_vectorized_matches_evaluate_loop(seed):
+    rng = random.Random(seed)
+    game = random_game(rng, rng.randrange(1, 80))
+    table = pattern_table(default_patterns(game.win_length))
+    for player in (1, 2):
+        ai = OmokAI(player, book_path=None, weights_path=None, evaluation='loop')
+        ai.use_win_length(game.win_length)
+        assert vectorized_score(game.board, player, table) == ai.evaluate_loop(game)
+
+# the batched move scores must match evaluate_move cell by cell, for both players and any move weights
+@pytest.mark.parametrize('seed', range(30))
+def test_batch_move_scores_match_evaluate_move(seed):
+    rng = random.Random(seed)
+    game = random_game(rng, rng.randrange(1, 80))
+    moves = sorted(game.candidates)
+    ai = OmokAI(1, book_path=None, weights_path=None)
+    ai.use_win_length(game.win_length)
+    for weights in (ai.move_weights, (900000, 70000, 8000)):
+        ai.move_weights = weights
+        for player in (1, 2):
+            scores = batch_move_scores(np.asarray(game.board), moves, player, game.win_length, weights)
+            assert scores.tolist() == [ai.evaluate_move(game, row, col, player) for row, col in moves]
+
+# the stacked child boards must score like each child position scored on its own
+@pytest.mark.parametrize('seed', range(30))
+def test_batch_child_scores_match_vectorized_score(seed):
+    rng = random.Random(seed)
+    game = random_game(rng, rng.randrange(1, 80))
+    moves = sorted(game.candidates)
+    table = pattern_table(default_patterns(game.win_length))
+    for player in (1, 2):
+        scores = batch_child_scores(np.asarray(game.board), moves, game.current_player, player, table)
+        expected = []
+        for move in moves:
+            game.make_move(*move)
+            expected.append(vectorized_score(game.board, player, table))
+            game.undo_move()
+        assert scores.tolist() == expected
@@ -0,0 +1,28 @@
+import random
+import pytest
+from game import OmokGame
+
+# plays the same random moves and take-backs on a NumPy board and a bitboard, checking that winners,
+# hashes, candidates and the board itself stay the same after every change
+@pytest.mark.parametrize('seed', range(30))
+def test_bitboard_matches_numpy(seed):
+    rng = random.Random(seed)
+    size, win_length = rng.choice([9, 15, 19]), rng.choice([3, 4, 5])
+    games = [OmokGame(size, backend=backend, win_length=win_length) for backend in ('numpy', 'bitboard')]
+    numpy_game, bit_game = games
+    for _ in range(120):
+        if numpy_game.move_history and (numpy_game.winner is not None or rng.random() < 0.2):
+            for game in games:
+                game.undo_move()
+        else:
+            cells = sorted(numpy_game.candidates) or [(size // 2, size // 2)]
+            move = rng.choice(cells)
+            for game in games:
+                game.make_move(*move)
+        assert bit_game.board.tolist() == numpy_game.board.tolist()
+        assert bit_game.winner == numpy_game.winner
+        assert bit_game.hash == numpy_game.hash
+        assert bit_game.symmetry_hashes == numpy_game.symmetry_hashes
+        assert bit_game.candidates == numpy_game.candidates
+        for row, col in numpy_game.move_history:
+            assert bit_game.check_win(row, col) == numpy_game.check_win(row, col)
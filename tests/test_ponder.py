@@ -0,0 +1,56 @@
+import threading
+import time
+from game import OmokGame
+from ai import OmokAI
+
+def opening():
+    game = OmokGame()
+    for move in [(9, 9), (9, 10), (10, 9), (8, 8)]:
+        game.make_move(*move)
+    return game
+
+def other_reply(game, predicted):
+    return next(move for move in [(10, 10), (8, 10), (11, 9)] if move != predicted and game.board[move] == 0)
+
+# the worker processes see the stop request, so a ponder miss ends the ponder search and the
+# real search keeps to its own time limit
+def test_ponder_miss_with_workers():
+    ai = OmokAI(1, workers=2, time_limit=1, book_path=None, weights_path=None)
+    try:
+        game = opening()
+        predicted = ai.ponder(game)
+        time.sleep(0.3)
+        game.make_move(*other_reply(game, predicted))
+        start = time.time()
+        move, stats = ai.search(game)
+        assert time.time() - start < 3
+        assert move is not None and not stats.ponder_hit
+    finally:
+        ai.close()
+
+def test_ponder_hit_with_workers():
+    ai = OmokAI(1, workers=2, time_limit=1, book_path=None, weights_path=None)
+    try:
+        game = opening()
+        predicted = ai.ponder(game)
+        time.sleep(0.3)
+        game.make_move(*predicted)
+        start = time.time()
+        move, stats = ai.search(game)
+        assert time.time() - start < 3
+        assert move is not None and stats.ponder_hit
+    finally:
+        ai.close()
+
+# a stop from another thread reaches a parallel search running in worker processes
+def test_stop_reaches_workers():
+    ai = OmokAI(1, workers=2, time_limit=60, book_path=None, weights_path=None)
+    try:
+        threading.Timer(0.5, ai.time_manager.stop).start()
+        start = time.time()
+        move, stats = ai.search(opening())
+        assert time.time() - start < 5
+        assert move is not None and stats.source == 'parallel'
+    finally:
+        ai.time_manager.clear_stop()
+        ai.close()
@@ -0,0 +1,32 @@
+from game import OmokGame
+from records import RecordWriter, RecordReader, RECORD_MAGIC
+
+def test_empty_files_have_no_games(tmp_path):
+    empty = tmp_path / 'empty.omr'
+    empty.write_bytes(b'')
+    assert len(RecordReader(str(empty))) == 0
+    # a writer that wrote no games leaves only the magic header
+    header_only = tmp_path / 'header.omr'
+    RecordWriter(str(header_only)).close()
+    assert header_only.read_bytes() == RECORD_MAGIC
+    assert len(RecordReader(str(header_only))) == 0
+
+def test_round_trip_and_truncated_last_game(tmp_path):
+    path = str(tmp_path / 'games.omr')
+    game = OmokGame(15)
+    for move in [(7, 7), (7, 8), (8, 8), (0, 14)]:
+        game.make_move(*move)
+    with RecordWriter(path) as writer:
+        writer.write_game(game, seed=3)
+        writer.write(19, [(9, 9), (18, 0)], 2, finished=True)
+    reader = RecordReader(path)
+    assert len(reader) == 2
+    assert reader.moves(0).tolist() == [[7, 7], [7, 8], [8, 8], [0, 14]]
+    assert reader.header(0)['seed'] == 3 and reader.winner(0) is None
+    assert reader.winner(1) == 2 and reader.replay(1).move_history == [(9, 9), (18, 0)]
+
+    with open(path, 'rb') as f:
+        data = f.read()
+    truncated = tmp_path / 'truncated.omr'
+    truncated.write_bytes(data[:-1])
+    assert len(RecordReader(str(truncated))) == 1
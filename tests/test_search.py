@@ -0,0 +1,55 @@
+import pytest
+from ai import OmokAI
+from evaluation import PATTERNS
+from game import OmokGame
+
+# alternates black and white stones into a move list, black first
+def interleave(black, white):
+    moves = []
+    for i in range(max(len(black), len(white))):
+        moves += black[i:i + 1] + white[i:i + 1]
+    return moves
+
+FAR = [(0, 0), (0, 18), (18, 0), (18, 18)]
+# tactical suite: (moves, depth, depth with quiescence, expected result for the side to move, defending moves);
+# 'win' positions have a forced win within depth (by any move), 'hold' positions must be defended with one
+# of the listed moves without losing. Depths are the smallest that prove each case: for a hold, the depth at
+# which a move that does not defend is seen to lose. block_four_three needs depth 6 for that without
+# quiescence, which takes about a minute, so it is held at depth 4 there
+VERIFY = {
+    'open_four': (interleave([(9, 8), (9, 9), (9, 10)], FAR[:3]), 3, 1, 'win', None),
+    'four_three': (interleave([(9, 6), (9, 7), (9, 8), (7, 9), (8, 9)], [(9, 5)] + FAR), 5, 1, 'win', None),
+    'three_three': (interleave([(9, 7), (9, 8), (7, 9), (8, 9)], FAR), 5, 2, 'win', None),
+    'block_three': (interleave([(3, 3), (3, 5), (15, 15)], [(9, 8), (9, 9), (9, 10)]), 4, 1, 'hold',
+                    [(9, 7), (9, 11)]),
+    'block_four_three': (interleave([(9, 5)] + FAR, [(9, 6), (9, 7), (9, 8), (7, 9), (8, 9)]), 4, 2, 'hold',
+                         [(9, 9)]),
+}
+# selective search settings checked on every position; the null move alone is left out, since without
+# late move reductions or quiescence the depth 5 wins take over 20 seconds each
+VARIANTS = {
+    'all': {'lmr': True, 'null_move': True, 'quiescence': True},
+    'lmr_null_move': {'lmr': True, 'null_move': True, 'quiescence': False},
+    'lmr': {'lmr': True, 'null_move': False, 'quiescence': False},
+    'quiescence': {'lmr': False, 'null_move': False, 'quiescence': True},
+}
+# a search value at least this large means a five is on the board at the end of the line
+WIN_SCORE = PATTERNS[(5, 0)]
+
+# late move reductions, null-move pruning and quiescence must still find every forced win and defence
+@pytest.mark.parametrize('variant', VARIANTS)
+@pytest.mark.parametrize('name', VERIFY)
+def test_selective_search_keeps_tactics(name, variant):
+    moves, depth, quiescence_depth, expected, defences = VERIFY[name]
+    options = VARIANTS[variant]
+    game = OmokGame()
+    for move in moves:
+        game.make_move(*move)
+    ai = OmokAI(game.current_player, time_limit=3600, max_depth=quiescence_depth if options['quiescence'] else depth,
+                threat_search=False, book_path=None, weights_path=None, **options)
+    move, stats = ai.search(game)
+    value = stats.iterations[-1]['value']
+    if expected == 'win':
+        assert value >= WIN_SCORE
+    else:
+        assert value > -WIN_SCORE and move in defences
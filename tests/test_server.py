@@ -0,0 +1,104 @@
+import asyncio
+from server import OmokServer, OmokClient
+
+# fast searches: no book or tuned weights, no threat search
+OPTIONS = {'book_path': None, 'weights_path': None, 'threat_search': False}
+
+# starts a server on a free localhost port, runs scenario with a connected client, and shuts both down
+def run(scenario):
+    async def main():
+        server = OmokServer(port=0, workers=2)
+        await server.start()
+        client = await OmokClient.connect(port=server.port)
+        try:
+            return await scenario(client)
+        finally:
+            await client.close()
+            await server.close()
+    return asyncio.run(main())
+
+def test_new_move_undo_state():
+    async def scenario(client):
+        session = (await client.call('new', size=15, options=OPTIONS))['session']
+        state = await client.call('move', session=session, move=[7, 7])
+        assert state['moves'] == [[7, 7]] and state['current_player'] == 2
+        error = await client.call('move', session=session, move=[7, 7])
+        assert error['type'] == 'error'
+        state = await client.call('undo', session=session)
+        assert state['moves'] == [] and state['current_player'] == 1
+        error = await client.call('state', session=12345)
+        assert error['type'] == 'error'
+        return await client.call('close', session=session)
+    assert run(scenario)['type'] == 'ok'
+
+def test_search_streams_iterations_and_plays():
+    async def scenario(client):
+        session = (await client.call('new', size=15, options=dict(OPTIONS, max_depth=2)))['session']
+        await client.call('move', session=session, move=[7, 7])
+        updates = []
+        result = await client.call('search', updates.append, session=session, play=True, time_limit=30)
+        return updates, result
+    updates, result = run(scenario)
+    assert [update['depth'] for update in updates] == [1, 2]
+    assert result['type'] == 'result' and not result['stopped']
+    assert result['state']['moves'] == [[7, 7], result['move']]
+
+def test_cancel_returns_best_move_so_far():
+    async def scenario(client):
+        session = (await client.call('new', size=19, options=OPTIONS))['session']
+        for move in ([9, 9], [9, 10], [10, 10]):
+            await client.call('move', session=session, move=move)
+        first = asyncio.get_running_loop().create_future()
+
+        def on_update(update):
+            if not first.done():
+                first.set_result(update)
+        request_id, future = client.send('search', on_update, session=session, time_limit=60)
+        await first
+        busy = await client.call('move', session=session, move=[0, 0])
+        assert busy['type'] == 'error'
+        assert (await client.call('cancel', request=request_id))['type'] == 'ok'
+        result = await asyncio.wait_for(future, 10)
+        state = await client.call('state', session=session)
+        return result, state
+    result, state = run(scenario)
+    assert result['stopped'] and result['move'] is not None
+    assert result['stats']['elapsed'] < 10
+    assert len(state['moves']) == 3
+
+def test_timeout_stops_search():
+    async def scenario(client):
+        session = (await client.call('new', size=19, options=OPTIONS))['session']
+        for move in ([9, 9], [9, 10], [10, 10]):
+            await client.call('move', session=session, move=move)
+        return await asyncio.wait_for(client.call('search', session=session, play=True, time_limit=60,
+                                                  timeout=0.5), 10)
+    result = run(scenario)
+    assert result['stopped'] and result['stats']['elapsed'] < 5
+    # a stopped search does not play its move
+    assert len(result['state']['moves']) == 3
+
+# bad requests get an error reply and leave the connection and its sessions open
+def test_bad_requests_keep_connection():
+    async def scenario(client):
+        session = (await client.call('new', size=15, options=OPTIONS))['session']
+        replies = [await client.call('move', session=session, move=[1.5, 2]),
+                   await client.call('move', session=session, move=[1]),
+                   await client.call('search', session=session, time_limit='soon')]
+        client.writer.write(b'[1, 2]\n"move"\n{not json\n')
+        state = await client.call('move', session=session, move=[7, 7])
+        return replies, state
+    replies, state = run(scenario)
+    assert all(reply['type'] == 'error' for reply in replies)
+    assert state['type'] == 'state' and state['moves'] == [[7, 7]]
+
+# with workers > 1 the search runs in other processes, which a timeout must stop as well
+def test_timeout_stops_worker_processes():
+    async def scenario(client):
+        session = (await client.call('new', size=19, options=dict(OPTIONS, workers=2)))['session']
+        for move in ([9, 9], [9, 10], [10, 10]):
+            await client.call('move', session=session, move=move)
+        return await asyncio.wait_for(client.call('search', session=session, time_limit=60, timeout=0.5), 10)
+    result = run(scenario)
+    assert result['stopped'] and result['move'] is not None
+    assert result['stats']['elapsed'] < 5
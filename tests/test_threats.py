@@ -0,0 +1,37 @@
+import threading
+import time
+from game import OmokGame
+from threats import ThreatSearch
+
+def build(moves):
+    game = OmokGame()
+    for move in moves:
+        game.make_move(*move)
+    return game
+
+# black has an open three on row 9 and white stones far away: a forced win
+OPEN_THREE = [(9, 8), (0, 0), (9, 9), (0, 18), (9, 10), (18, 0)]
+
+def test_finds_forced_win_within_budget():
+    search = ThreatSearch(time_limit=5)
+    assert search.find_forced_move(build(OPEN_THREE)) in [(9, 7), (9, 11)]
+
+# a stop request or a deadline already passed ends the search before it looks for a forced win,
+# but a five on the board next move is still found, since that needs no search
+def test_stop_event_and_deadline_cut_the_search():
+    stop = threading.Event()
+    stop.set()
+    search = ThreatSearch(time_limit=5)
+    assert search.find_forced_move(build(OPEN_THREE), stop_event=stop) is None
+    assert search.find_forced_move(build(OPEN_THREE), deadline=time.time() - 1) is None
+    four = build(OPEN_THREE + [(9, 11), (18, 18)])
+    assert search.find_forced_move(four, stop_event=stop) in [(9, 7), (9, 12)]
+
+# nodes counts the VCF pass and the VCT pass that follows it; each pass gets max_nodes of its own
+def test_nodes_count_both_passes():
+    moves = [(9, 9), (0, 0), (9, 10), (0, 18), (10, 9), (18, 0)]
+    search = ThreatSearch(max_nodes=20, time_limit=60)
+    assert search.find_forced_move(build(moves)) is None
+    vcf, vct = ThreatSearch(max_nodes=20, time_limit=60), ThreatSearch(max_nodes=20, time_limit=60)
+    assert vcf.find_win(build(moves), False) is None and vct.find_win(build(moves), True) is None
+    assert vct.nodes >= 20 and search.nodes == vcf.nodes + vct.nodes
@@ -0,0 +1,39 @@
+import time
+import pytest
+from game import OmokGame
+from timeman import TimeManager
+
+# node counts that grow in steps (quiescence nodes, frontier batches) never land on a multiple of
+# the interval, but the clock must still be read once the interval has passed
+def test_check_reads_clock_when_count_steps_over_interval():
+    manager = TimeManager(time_limit=1, check_interval=256)
+    manager.start(OmokGame(), start_time=time.time() - 10)
+    nodes = 0
+    with pytest.raises(TimeoutError):
+        while nodes < 1000:
+            nodes += 7
+            manager.check(nodes)
+    assert 256 <= nodes < 256 + 7
+
+def test_check_reads_clock_once_per_interval():
+    manager = TimeManager(time_limit=1000, check_interval=256)
+    manager.start(OmokGame())
+    manager.check(300)
+    assert manager.next_check == 556
+    manager.stop()
+    manager.check(555)
+    with pytest.raises(TimeoutError):
+        manager.check(556)
+
+# a ponder hit after the pondering has used up the soft budget stops the search at once
+def test_late_ponderhit_stops_search():
+    game = OmokGame()
+    manager = TimeManager(time_limit=2)
+    manager.start(game, start_time=time.time() - 1.5, ponder=True)
+    manager.ponderhit(game)
+    assert manager.stop_event.is_set()
+
+    manager = TimeManager(time_limit=2)
+    manager.start(game, ponder=True)
+    manager.ponderhit(game)
+    assert not manager.stop_event.is_set() and manager.hard == 2
@@ -0,0 +1,50 @@
+import numpy as np
+from ai import OmokAI
+from evaluation import PATTERNS, save_weights
+from game import OmokGame
+from tuning import make_monotone, is_monotone, fit_weights
+
+KEYS = list(PATTERNS)
+
+def test_built_in_patterns_are_monotone():
+    assert is_monotone(PATTERNS)
+
+def test_make_monotone_raises_open_and_longer_runs():
+    weights = np.array(list(PATTERNS.values()), dtype=float)
+    weights[KEYS.index((3, 2))] = 1834
+    weights[KEYS.index((3, 1))] = 3742
+    weights[KEYS.index((2, 2))] = 4327
+    assert not is_monotone(dict(zip(KEYS, weights)))
+    fixed = dict(zip(KEYS, make_monotone(weights, KEYS)))
+    assert is_monotone(fixed)
+    assert fixed[(3, 2)] >= fixed[(3, 1)] and fixed[(3, 2)] >= fixed[(2, 2)]
+
+# results that reward closed threes and punish open ones would pull the weights out of order
+def test_fit_weights_stays_monotone():
+    rng = np.random.default_rng(0)
+    features = rng.integers(-3, 4, size=(500, len(KEYS))).astype(float)
+    results = ((features[:, KEYS.index((3, 1))] - features[:, KEYS.index((3, 2))]) > 0).astype(float)
+    weights, _ = fit_weights(features, results, list(PATTERNS.values()), 1e-4, KEYS, epochs=50)
+    assert is_monotone(dict(zip(KEYS, weights)))
+
+# the fit never moves the four weights (no quiet position holds a four), so threes raised past them
+# must lift them too
+def test_longer_runs_stay_above_shorter_ones():
+    weights = {**PATTERNS, (3, 2): 78087, (2, 2): 78087}
+    assert not is_monotone(weights)
+    fixed = dict(zip(KEYS, make_monotone(list(weights.values()), KEYS)))
+    assert is_monotone(fixed)
+    assert fixed[(4, 1)] >= fixed[(3, 2)] and fixed[(4, 2)] >= fixed[(4, 1)]
+
+# weights written before the fix: an open three above a four must not make LMR reduce a move that
+# makes an open four
+def test_lmr_threat_threshold_ignores_tuned_weights(tmp_path):
+    path = str(tmp_path / 'weights.json')
+    save_weights(path, {**PATTERNS, (3, 2): 78087, (2, 2): 78087})
+    ai = OmokAI(1, book_path=None, weights_path=path)
+    assert ai.move_weights == (1000000, 50000, 78087)
+    game = OmokGame()
+    for move in [(9, 9), (0, 0), (9, 10), (0, 18), (9, 11), (18, 0)]:
+        game.make_move(*move)
+    assert ai.reduction(game, (9, 12), 5, 4, 1) == 0
+    assert ai.reduction(game, (2, 2), 5, 4, 1) == 1
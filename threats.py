@@ -0,0 +1,235 @@
+import time
+
+DIRECTIONS = [(1, 0), (0, 1), (1, 1), (1, -1)]
+
+# the helpers below read a plain list-of-lists copy of the board, which is much faster to index than NumPy
+# "five" stands for a winning run of win_length stones, and a four or three for one or two stones short of it
+
+# number of player stones in a row through (row, col), counting (row, col) itself as the player's
+def run_length(grid, row, col, player, dr, dc):
+    size = len(grid)
+    count = 1
+    r, c = row + dr, col + dc
+    while 0 <= r < size and 0 <= c < size and grid[r][c] == player:
+        count += 1
+        r += dr
+        c += dc
+    r, c = row - dr, col - dc
+    while 0 <= r < size and 0 <= c < size and grid[r][c] == player:
+        count += 1
+        r -= dr
+        c -= dc
+    return count
+
+# whether a player stone on the empty cell (row, col) would complete five or more
+def makes_five(grid, row, col, player, win_length=5):
+    for dr, dc in DIRECTIONS:
+        if run_length(grid, row, col, player, dr, dc) >= win_length:
+            return True
+    return False
+
+# cheap filter: some line through (row, col) has at least `need` player stones within reach steps
+def has_potential(grid, row, col, player, need, reach=4):
+    size = len(grid)
+    for dr, dc in DIRECTIONS:
+        count = 0
+        for i in range(-reach, reach + 1):
+            r, c = row + dr * i, col + dc * i
+            if i and 0 <= r < size and 0 <= c < size and grid[r][c] == player:
+                count += 1
+        if count >= need:
+            return True
+    return False
+
+# empty cells on the given lines through (row, col), up to reach steps away
+def line_cells(grid, row, col, reach=4, directions=DIRECTIONS):
+    size = len(grid)
+    cells = []
+    for dr, dc in directions:
+        for i in range(-reach, reach + 1):
+            r, c = row + dr * i, col + dc * i
+            if i and 0 <= r < size and 0 <= c < size and grid[r][c] == 0:
+                cells.append((r, c))
+    return cells
+
+# empty cells among candidates where player would complete five right now
+def five_cells(grid, candidates, player, win_length=5):
+    return [cell for cell in candidates if makes_five(grid, cell[0], cell[1], player, win_length)]
+
+# five-completing cells on the lines through the stone at (row, col); each cell is only checked
+# along the line it shares with the stone, since a five along another line would not involve it
+def five_cells_through(grid, row, col, player, win_length=5):
+    size = len(grid)
+    reach = win_length - 1
+    cells = set()
+    for dr, dc in DIRECTIONS:
+        for i in range(-reach, reach + 1):
+            r, c = row + dr * i, col + dc * i
+            if (i and 0 <= r < size and 0 <= c < size and grid[r][c] == 0
+                    and run_length(grid, r, c, player, dr, dc) >= win_length):
+                cells.add((r, c))
+    return cells
+
+# moves that make a four, mapped to the cells that would then complete five
+def four_moves(grid, candidates, player, win_length=5):
+    fours = {}
+    for row, col in candidates:
+        if not has_potential(grid, row, col, player, win_length - 2, win_length - 1):
+            continue
+        grid[row][col] = player
+        threats = five_cells_through(grid, row, col, player, win_length)
+        grid[row][col] = 0
+        if threats:
+            fours[(row, col)] = threats
+    return fours
+
+# cells on the lines through (row, col) that would turn the player's stones there into an open four
+def open_four_cells(grid, row, col, player, win_length=5):
+    cells = []
+    for r, c in line_cells(grid, row, col, win_length - 1):
+        if not has_potential(grid, r, c, player, win_length - 2, win_length - 1):
+            continue
+        grid[r][c] = player
+        if len(five_cells_through(grid, r, c, player, win_length)) >= 2:
+            cells.append((r, c))
+        grid[r][c] = 0
+    return cells
+
+# moves that make an open three, i.e. threaten an open four next move
+def three_moves(grid, candidates, player, win_length=5):
+    threes = []
+    for row, col in candidates:
+        if not has_potential(grid, row, col, player, win_length - 3, win_length - 1):
+            continue
+        grid[row][col] = player
+        if open_four_cells(grid, row, col, player, win_length):
+            threes.append((row, col))
+        grid[row][col] = 0
+    return threes
+
+# direction of the line joining two cells that share one
+def direction_between(a, b):
+    dr, dc = b[0] - a[0], b[1] - a[1]
+    for direction in DIRECTIONS:
+        if dr * direction[1] == dc * direction[0]:
+            return direction
+    return None
+
+class ThreatSearch:
+    # continuous-threat search limited by attacker moves, nodes and seconds
+    def __init__(self, max_depth=8, max_nodes=5000, time_limit=1.0):
+        self.max_depth = max_depth
+        self.max_nodes = max_nodes
+        self.time_limit = time_limit
+        self.nodes = 0
+
+    # returns a move the side to move has to play: its own win, the only block, or the start of a forced win
+    # deadline (a time.time() value) can cut the search short of time_limit, and a set stop_event ends it
+    # nodes counts both passes (VCF, then VCT)
+    def find_forced_move(self, game, use_threes=True, deadline=None, stop_event=None):
+        self.nodes = 0
+        player = game.current_player
+        grid = game.board.tolist()
+        wins = five_cells(grid, game.candidates, player, game.win_length)
+        if wins:
+            return wins[0]
+        blocks = five_cells(grid, game.candidates, 3 - player, game.win_length)
+        if blocks:
+            return blocks[0]
+        move = self.find_win(game, False, deadline, stop_event)
+        if move is None and use_threes:
+            move = self.find_win(game, True, deadline, stop_event)
+        return move
+
+    # first move of a forced win for the side to move using fours only (VCF) or fours and threes (VCT);
+    # nodes keeps counting from earlier passes, and each pass may search max_nodes more
+    def find_win(self, game, use_threes=False, deadline=None, stop_event=None):
+        self.node_limit = self.nodes + self.max_nodes
+        self.deadline = time.time() + self.time_limit
+        if deadline is not None:
+            self.deadline = min(self.deadline, deadline)
+        self.stop_event = stop_event
+        self.game = game
+        self.grid = game.board.tolist()
+        self.win_length = game.win_length
+        return self.attack(self.max_depth, use_threes)
+
+    # plays a move on the game and the grid copy together
+    def play(self, move):
+        self.grid[move[0]][move[1]] = self.game.current_player
+        self.game.make_move(*move)
+
+    def take_back(self):
+        row, col = self.game.move_history[-1]
+        self.game.undo_move()
+        self.grid[row][col] = 0
+
+    def out_of_budget(self):
+        return (self.nodes >= self.node_limit or time.time() > self.deadline
+                or (self.stop_event is not None and self.stop_event.is_set()))
+
+    def attack(self, depth, use_threes):
+        self.nodes += 1
+        grid, candidates, win_length = self.grid, self.game.candidates, self.win_length
+        attacker = self.game.current_player
+        defender = 3 - attacker
+        wins = five_cells(grid, candidates, attacker, win_length)
+        if wins:
+            return wins[0]
+        # a pending four from the defender would have to be answered first, which this search does not follow
+        if depth == 0 or self.out_of_budget() or five_cells(grid, candidates, defender, win_length):
+            return None
+
+        # fours: the defender has exactly one answer
+        for move, threats in four_moves(grid, list(candidates), attacker, win_length).items():
+            if len(threats) >= 2:
+                return move
+            block = next(iter(threats))
+            self.play(move)
+            self.play(block)
+            found = self.attack(depth - 1, use_threes)
+            self.take_back()
+            self.take_back()
+            if found is not None:
+                return move
+            if self.out_of_budget():
+                return None
+
+        if not use_threes:
+            return None
+
+        # threes: every defence has to lose, and the defender must have no four to counter with
+        for move in three_moves(grid, list(candidates), attacker, win_length):
+            self.play(move)
+            if four_moves(grid, list(candidates), defender, win_length):
+                self.take_back()
+                continue
+            refuted = False
+            for defence in self.defences(move, attacker):
+                self.play(defence)
+                found = self.attack(depth - 1, use_threes)
+                self.take_back()
+                if found is None:
+                    refuted = True
+                    break
+            self.take_back()
+            if not refuted:
+                return move
+            if self.out_of_budget():
+                return None
+        return None
+
+    # defender moves that stop the three at move from becoming an open four; only the lines
+    # holding one of its open-four cells can contain a defence
+    def defences(self, move, attacker):
+        grid, win_length = self.grid, self.win_length
+        defender = 3 - attacker
+        row, col = move
+        directions = {direction_between(move, cell) for cell in open_four_cells(grid, row, col, attacker, win_length)}
+        cells = []
+        for r, c in line_cells(grid, row, col, reach=win_length, directions=[d for d in directions if d]):
+            grid[r][c] = defender
+            if not open_four_cells(grid, row, col, attacker, win_length):
+                cells.append((r, c))
+            grid[r][c] = 0
+        return cells
@@ -0,0 +1,161 @@
+import threading
+import time
+
+# nodes between clock reads inside the search
+CHECK_INTERVAL = 256
+# share of the fixed per-move limit used before deciding not to start another iteration
+SOFT_SHARE = 0.5
+# with a game clock: own moves assumed left in the game, and never fewer than this
+EXPECTED_MOVES = 40
+MIN_MOVES_LEFT = 12
+# the hard limit is this many soft budgets, but never more than this share of the clock
+HARD_RATIO = 4
+MAX_CLOCK_SHARE = 0.3
+# seconds kept back on the clock for move overhead
+CLOCK_MARGIN = 0.05
+# soft budget scale per best-move change, its cap, and the scale once the best move is settled
+INSTABILITY_STEP = 0.5
+MAX_EXTENSION = 2.0
+STABLE_SCALE = 0.6
+STABLE_ITERATIONS = 3
+# a score drop this large since the previous same-parity iteration counts as a best-move change
+SCORE_DROP = 20000
+
+class TimeManager:
+    # time_limit is the flat per-move budget; clock (seconds left for the game) and increment
+    # (seconds added after each move) switch to clock mode, where each move gets a share of the clock
+    # moves_to_go, if known, replaces the estimate of moves left until the next time control
+    def __init__(self, time_limit=10, clock=None, increment=0.0, moves_to_go=None, check_interval=CHECK_INTERVAL):
+        self.time_limit = time_limit
+        self.remaining = clock
+        self.increment = increment
+        self.moves_to_go = moves_to_go
+        self.check_interval = check_interval
+        # node count at which check next reads the clock
+        self.next_check = check_interval
+        self.start_time = time.time()
+        self.soft = self.hard = time_limit
+        self.iterations = []
+        self.changes = 0
+        self.stable = 0
+        # clock time is charged from here, later than start_time after a ponder hit
+        self.charge_time = self.start_time
+        self.pondering = False
+        # set from another thread to abort the running search
+        self.stop_event = threading.Event()
+
+    # updates the game clock from outside, e.g. from a GUI or a server that keeps the real clock
+    def set_clock(self, remaining, increment=None, moves_to_go=None):
+        self.remaining = remaining
+        if increment is not None:
+            self.increment = increment
+        self.moves_to_go = moves_to_go
+
+    # starts timing a move; budget is a (soft, hard) pair that overrides the allocation,
+    # used by worker processes that share the parent's deadlines
+    # ponder searches without a budget until ponderhit or stop
+    def start(self, game, start_time=None, budget=None, ponder=False):
+        self.start_time = self.charge_time = time.time() if start_time is None else start_time
+        self.next_check = self.check_interval
+        self.iterations = []
+        self.changes = 0
+        self.stable = 0
+        self.pondering = ponder
+        if ponder:
+            self.soft = self.hard = float('inf')
+        else:
+            self.soft, self.hard = budget if budget is not None else self.allocate(game)
+        return self.soft, self.hard
+
+    # (soft, hard) budget for the move about to be searched
+    def allocate(self, game):
+        if self.remaining is None:
+            return self.time_limit * SOFT_SHARE, self.time_limit
+        moves_left = self.moves_to_go or max(MIN_MOVES_LEFT, EXPECTED_MOVES - len(game.move_history) // 2)
+        available = max(0.0, self.remaining - CLOCK_MARGIN)
+        soft = min(available, available / moves_left + self.increment * 0.8)
+        hard = min(available, max(soft, min(soft * HARD_RATIO, available * MAX_CLOCK_SHARE + self.increment)))
+        return soft, hard
+
+    # the opponent played the move being pondered: the search goes on under a normal budget,
+    # counted from the start of pondering, while only the time from now on is charged to the clock;
+    # a ponder that already used the soft budget is stopped at once rather than left to run its
+    # current iteration up to the hard limit
+    def ponderhit(self, game):
+        self.soft, self.hard = self.allocate(game)
+        self.charge_time = time.time()
+        self.pondering = False
+        if self.elapsed() >= self.soft_limit():
+            self.stop()
+
+    # asks the running search to stop at its next clock check; whoever stops a search clears
+    # the request once it has returned, so a stop sent just before a search starts is not lost
+    def stop(self):
+        self.stop_event.set()
+
+    def clear_stop(self):
+        self.stop_event.clear()
+
+    # charges the move to the game clock and adds the increment
+    def finish(self):
+        elapsed = time.time() - self.charge_time
+        if self.remaining is not None:
+            self.remaining = max(0.0, self.remaining - elapsed) + self.increment
+        return elapsed
+
+    def elapsed(self):
+        return time.time() - self.start_time
+
+    # cheap check called on every node: reads the clock once check_interval nodes have passed since
+    # the last read; a threshold rather than a multiple, since quiescence and frontier batches add
+    # several nodes at a time and would step over exact multiples
+    def check(self, nodes):
+        if nodes >= self.next_check:
+            self.next_check = nodes + self.check_interval
+            if time.time() - self.start_time >= self.hard or self.stop_event.is_set():
+                raise TimeoutError()
+
+    # records a finished iteration; a new best move or a falling score makes the position unstable
+    def add_iteration(self, depth, move, value, nodes):
+        seconds = self.elapsed()
+        if self.iterations:
+            previous_move = self.iterations[-1][1]
+            dropped = (len(self.iterations) >= 2 and value != float('-inf')
+                       and self.iterations[-2][2] - value >= SCORE_DROP)
+            if move != previous_move or dropped:
+                self.changes += 1
+                self.stable = 0
+            else:
+                self.stable += 1
+        self.iterations.append((depth, move, value, nodes, seconds))
+
+    # effective branching factor: growth in nodes per iteration, taken over two iterations
+    # when possible because the tree grows unevenly between odd and even depths
+    def branching_factor(self):
+        cumulative = [0] + [it[3] for it in self.iterations]
+        nodes = [b - a for a, b in zip(cumulative, cumulative[1:])]
+        if len(nodes) >= 3 and nodes[-3] > 0:
+            return (nodes[-1] / nodes[-3]) ** 0.5
+        if len(nodes) >= 2 and nodes[-2] > 0:
+            return nodes[-1] / nodes[-2]
+        return None
+
+    # soft budget scaled up after best-move changes and down once the best move has settled
+    def soft_limit(self):
+        if self.stable >= STABLE_ITERATIONS:
+            scale = STABLE_SCALE
+        else:
+            scale = min(MAX_EXTENSION, 1 + INSTABILITY_STEP * self.changes)
+        return min(self.hard, self.soft * scale)
+
+    # whether to start the next iteration: within the soft budget, and predicted
+    # (last iteration time times the effective branching factor) to finish before the hard limit
+    def continue_search(self):
+        elapsed = self.elapsed()
+        if self.stop_event.is_set() or elapsed >= self.soft_limit():
+            return False
+        factor = self.branching_factor()
+        if factor is None:
+            return elapsed < self.hard
+        last = self.iterations[-1][4] - (self.iterations[-2][4] if len(self.iterations) >= 2 else 0)
+        return elapsed + last * factor < self.hard
@@ -0,0 +1,153 @@
+from array import array
+
+# bound types for stored search values
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# bytes used by one table entry: key, value, move, depth, flag, generation, symmetry
+ENTRY_BYTES = 8 + 8 + 2 + 1 + 1 + 1 + 1
+CACHE_ENTRY_BYTES = 8 + 8
+
+# largest power of two not above n (at least 1)
+def power_of_two_below(n):
+    size = 1
+    while size * 2 <= n:
+        size *= 2
+    return size
+
+# moves are stored as a single int16 (row << 8 | col), -1 for no move
+def encode_move(move):
+    return -1 if move is None else (move[0] << 8) | move[1]
+
+def decode_move(code):
+    return None if code < 0 else (code >> 8, code & 0xFF)
+
+class TranspositionTable:
+    # preallocates a fixed number of two-slot buckets that fit in size_mb megabytes
+    def __init__(self, size_mb=32):
+        entries = max(2, int(size_mb * 1024 * 1024) // ENTRY_BYTES)
+        self.buckets = power_of_two_below(entries // 2)
+        self.mask = self.buckets - 1
+        n = self.buckets * 2
+        self.keys = array('Q', bytes(8 * n))
+        self.values = array('q', bytes(8 * n))
+        self.moves = array('h', [-1]) * n
+        # depth -1 marks an empty slot
+        self.depths = array('b', [-1]) * n
+        self.flags = array('b', bytes(n))
+        self.generations = array('B', bytes(n))
+        # orientation the entry was stored from, when keys are canonical over board symmetries
+        self.symmetries = array('B', bytes(n))
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        self.symmetry_hits = 0
+
+    # starts a new search so entries left over from earlier moves age out first
+    def new_search(self):
+        self.generation = (self.generation + 1) & 0xFF
+
+    # returns (value, move, depth, flag) for key, or None on a miss; symmetry is the caller's
+    # orientation, counted as a symmetry hit when the entry came from another one
+    def probe(self, key, symmetry=0):
+        i = (key & self.mask) << 1
+        for slot in (i, i + 1):
+            if self.keys[slot] == key and self.depths[slot] >= 0:
+                self.hits += 1
+                if self.symmetries[slot] != symmetry:
+                    self.symmetry_hits += 1
+                # refreshes the entry so it survives aging
+                self.generations[slot] = self.generation
+                return (self.values[slot], decode_move(self.moves[slot]),
+                        self.depths[slot], self.flags[slot])
+        self.misses += 1
+        return None
+
+    # first slot is depth-preferred, second slot is always-replace
+    def store(self, key, value, move, depth, flag, symmetry=0):
+        i = (key & self.mask) << 1
+        if (self.keys[i] == key or self.depths[i] <= depth
+                or self.generations[i] != self.generation):
+            slot = i
+        else:
+            slot = i + 1
+        if (self.depths[slot] >= 0 and self.keys[slot] != key
+                and self.generations[slot] == self.generation):
+            self.collisions += 1
+        self.keys[slot] = key
+        self.values[slot] = value
+        self.moves[slot] = encode_move(move)
+        self.depths[slot] = min(depth, 127)
+        self.flags[slot] = flag
+        self.generations[slot] = self.generation
+        self.symmetries[slot] = symmetry
+
+    def clear(self):
+        n = self.buckets * 2
+        self.depths = array('b', [-1]) * n
+        self.hits = self.misses = self.collisions = self.symmetry_hits = 0
+
+    # memory actually held by the preallocated arrays
+    def nbytes(self):
+        return sum(a.itemsize * len(a) for a in (self.keys, self.values, self.moves, self.depths,
+                                                 self.flags, self.generations, self.symmetries))
+
+    # counters for monitoring
+    def stats(self):
+        probes = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'collisions': self.collisions,
+            'symmetry_hits': self.symmetry_hits,
+            'hit_rate': self.hits / probes if probes else 0.0,
+            'entries': self.buckets * 2,
+            'bytes': self.nbytes(),
+        }
+
+class EvaluationCache:
+    # direct-mapped, always-replace cache of static evaluations keyed by position hash
+    def __init__(self, size_mb=8):
+        self.size = power_of_two_below(max(1, int(size_mb * 1024 * 1024) // CACHE_ENTRY_BYTES))
+        self.mask = self.size - 1
+        self.keys = array('Q', bytes(8 * self.size))
+        self.values = array('q', bytes(8 * self.size))
+        self.used = array('b', bytes(self.size))
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+
+    # returns the cached score for key, or None on a miss
+    def probe(self, key):
+        i = key & self.mask
+        if self.used[i] and self.keys[i] == key:
+            self.hits += 1
+            return self.values[i]
+        self.misses += 1
+        return None
+
+    def store(self, key, value):
+        i = key & self.mask
+        if self.used[i] and self.keys[i] != key:
+            self.collisions += 1
+        self.keys[i] = key
+        self.values[i] = value
+        self.used[i] = 1
+
+    def clear(self):
+        self.used = array('b', bytes(self.size))
+        self.hits = self.misses = self.collisions = 0
+
+    def nbytes(self):
+        return sum(a.itemsize * len(a) for a in (self.keys, self.values, self.used))
+
+    def stats(self):
+        probes = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'collisions': self.collisions,
+            'hit_rate': self.hits / probes if probes else 0.0,
+            'entries': self.size,
+            'bytes': self.nbytes(),
+        }
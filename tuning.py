@@ -0,0 +1,194 @@
+import argparse
+import time
+import numpy as np
+from evaluation import PATTERNS, DEFAULT_WEIGHTS_PATH, default_patterns, load_weights, pattern_features, save_weights
+from records import RecordReader, FINISHED
+from selfplay import run_matches, side_options
+from threats import five_cells
+
+# boards stacked per feature extraction pass
+FEATURE_BATCH = 4096
+# candidate sigmoid scales tried when fitting K to the starting weights
+SCALES = np.logspace(-7, -3, 81)
+# gradient descent on the log of each weight: starting step, and the step factors after a better or worse epoch
+LEARNING_RATE = 0.5
+STEP_UP = 1.2
+STEP_DOWN = 0.5
+# fewer quiet positions than this give weights that fit noise, so they are not written
+MIN_POSITIONS = 2000
+
+# quiet positions of the finished games in a record file with one board size and win length, as
+# features for the side to move minus those of the opponent, and the game result for the side to
+# move (1 win, 0.5 draw, 0 loss); positions where either side can complete a five are skipped
+# since their static score says nothing about the result
+def load_positions(path, patterns, win_length=5, min_ply=4, every=1, games=None):
+    reader = RecordReader(path)
+    features, results, boards, labels = [], [], [], []
+
+    def flush():
+        stacked = pattern_features(np.array(boards), patterns)
+        # boards are stored with the side to move as player 1
+        features.append(stacked[0] - stacked[1])
+        results.extend(labels)
+        boards.clear()
+        labels.clear()
+
+    for index in range(len(reader) if games is None else min(games, len(reader))):
+        header, moves = reader[index]
+        if header['win_length'] != win_length or not header['flags'] & FINISHED:
+            continue
+        winner = reader.winner(index)
+        game = reader.replay(index, min_ply)
+        for ply, move in enumerate(moves[min_ply:].tolist(), min_ply):
+            if game.is_terminal():
+                break
+            player = game.current_player
+            grid = game.board.tolist()
+            if (ply - min_ply) % every == 0 and not (five_cells(grid, game.candidates, player, win_length)
+                                                     or five_cells(grid, game.candidates, 3 - player, win_length)):
+                board = np.asarray(game.board)
+                boards.append(np.where(board == 0, 0, np.where(board == player, 1, 2)))
+                labels.append(0.5 if winner is None else float(winner == player))
+                if len(boards) == FEATURE_BATCH:
+                    flush()
+            game.make_move(*move)
+    if boards:
+        flush()
+    if not features:
+        return np.zeros((0, len(patterns))), np.zeros(0)
+    return np.concatenate(features).astype(float), np.array(results)
+
+# for each entry of patterns, the entries it must score at least as high as: every shorter run, and
+# runs of the same length with fewer open ends, so a closed four never scores below an open three.
+# The quiet-position filter leaves the four features at zero, so without the cross-length order
+# nothing would keep the fours above the threes the fit raises
+def dominated(keys):
+    return [[j for j, other in enumerate(keys) if other < key] for key in keys]
+
+# raises each weight to the largest weight it dominates; dominated entries sort first, so one pass suffices
+def make_monotone(weights, keys):
+    weights = np.array(weights, dtype=float)
+    below = dominated(keys)
+    for i in sorted(range(len(keys)), key=lambda i: keys[i]):
+        if below[i]:
+            weights[i] = max(weights[i], weights[below[i]].max())
+    return weights
+
+def is_monotone(patterns):
+    keys = list(patterns)
+    values = list(patterns.values())
+    return all(values[i] >= values[j] for i, below in enumerate(dominated(keys)) for j in below)
+
+def sigmoid(x):
+    return 1 / (1 + np.exp(-np.clip(x, -500, 500)))
+
+# Texel error: mean squared difference between the results and the win probability the scores predict
+def texel_error(features, results, weights, scale):
+    return float(np.mean((sigmoid(scale * (features @ weights)) - results) ** 2))
+
+# sigmoid scale under which the starting weights predict the results best
+def fit_scale(features, results, weights):
+    errors = [texel_error(features, results, weights, scale) for scale in SCALES]
+    return float(SCALES[int(np.argmin(errors))])
+
+# full-batch gradient descent on log weights, which keeps every weight positive and moves weights of
+# very different sizes by similar ratios; weights whose feature never occurs are left alone, and
+# after every step the weights are made monotone over keys (the patterns' (length, open ends))
+def fit_weights(features, results, weights, scale, keys, epochs=200):
+    log_weights = make_monotone(np.log(np.asarray(weights, dtype=float)), keys)
+    active = features.any(axis=0)
+    best = texel_error(features, results, np.exp(log_weights), scale)
+    rate = LEARNING_RATE
+    for _ in range(epochs):
+        weights = np.exp(log_weights)
+        predicted = sigmoid(scale * (features @ weights))
+        slope = 2 * (predicted - results) * predicted * (1 - predicted) * scale
+        gradient = (features.T @ slope) / len(results) * weights
+        norm = np.abs(gradient[active]).max() if active.any() else 0.0
+        if norm == 0:
+            break
+        trial = make_monotone(log_weights - rate * np.where(active, gradient, 0.0) / norm, keys)
+        error = texel_error(features, results, np.exp(trial), scale)
+        if error < best:
+            log_weights, best = trial, error
+            rate *= STEP_UP
+        else:
+            rate *= STEP_DOWN
+    return np.exp(log_weights), best
+
+# plays depth-capped games between the tuned weights and the built-in patterns, each side taking
+# black in half of them; returns the tuned side's score as a share of the games
+def compare(weights_path, games, depth, workers=1, size=19, win_length=5):
+    tuned = dict(side_options(3600, depth), weights_path=weights_path)
+    baseline = dict(side_options(3600, depth), weights_path=None)
+    half = games // 2
+    as_black = run_matches(half, tuned, baseline, workers, size=size, win_length=win_length, random_plies=2)
+    as_white = run_matches(games - half, baseline, tuned, workers, size=size, win_length=win_length,
+                           random_plies=2, seed=1)
+    points = sum(1.0 if r['winner'] == 1 else 0.5 if r['winner'] is None else 0.0 for r in as_black)
+    points += sum(1.0 if r['winner'] == 2 else 0.5 if r['winner'] is None else 0.0 for r in as_white)
+    return points / games if games else 0.0
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit pattern weights to game results (Texel tuning).")
+    parser.add_argument('records', help="record file to fit on; self-play games are added to it with --selfplay")
+    parser.add_argument('--selfplay', type=int, default=0, help="first play this many self-play games into records")
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--time-limit', type=float, default=0.5, help="seconds per self-play move")
+    parser.add_argument('--max-moves', type=int, default=None, help="moves before a self-play game is scored a draw")
+    parser.add_argument('--size', type=int, default=19, help="board size of the self-play games")
+    parser.add_argument('--win-length', type=int, default=5)
+    parser.add_argument('--games', type=int, default=None, help="fit on only the first this many games")
+    parser.add_argument('--min-ply', type=int, default=4, help="opening plies left out of the fit")
+    parser.add_argument('--every', type=int, default=1, help="use every n-th ply")
+    parser.add_argument('--epochs', type=int, default=200)
+    parser.add_argument('--validation', type=float, default=0.1, help="share of positions held out")
+    parser.add_argument('--min-positions', type=int, default=MIN_POSITIONS, help="fewest positions to write weights from")
+    parser.add_argument('--start', default=None, help="weights file to start from instead of the built-in patterns")
+    parser.add_argument('--output', default=DEFAULT_WEIGHTS_PATH)
+    parser.add_argument('--compare', type=int, default=0, help="then play this many games against the built-in patterns")
+    parser.add_argument('--compare-depth', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.selfplay:
+        options = side_options(args.time_limit, None)
+        run_matches(args.selfplay, options, options, args.workers, records=args.records, size=args.size,
+                    win_length=args.win_length, max_moves=args.max_moves, random_plies=4, seed=args.seed)
+
+    loaded = load_weights(args.start)
+    if loaded is not None and loaded[0] == args.win_length:
+        patterns = loaded[1]
+    else:
+        patterns = PATTERNS if args.win_length == 5 else default_patterns(args.win_length)
+    start = time.perf_counter()
+    features, results = load_positions(args.records, patterns, args.win_length, args.min_ply, args.every, args.games)
+    print(f"{len(results)} positions in {time.perf_counter() - start:.1f}s")
+    if len(results) < args.min_positions:
+        parser.error(f"{len(results)} quiet positions with win length {args.win_length} in {args.records}, "
+                     f"need at least {args.min_positions}")
+
+    order = np.random.default_rng(args.seed).permutation(len(results))
+    held = int(len(results) * args.validation)
+    train, test = order[held:], order[:held]
+    weights = np.array(list(patterns.values()), dtype=float)
+    scale = fit_scale(features[train], results[train], weights)
+    before = texel_error(features[test], results[test], weights, scale) if held else None
+    weights, error = fit_weights(features[train], results[train], weights, scale, list(patterns), args.epochs)
+    after = texel_error(features[test], results[test], weights, scale) if held else None
+    tuned = {key: int(round(value)) for key, value in zip(patterns, weights)}
+    print(f"scale {scale:.3g}, training error {error:.5f}"
+          + (f", validation error {before:.5f} -> {after:.5f}" if held else ""))
+    for (length, open_ends), value in tuned.items():
+        print(f"  ({length}, {open_ends}): {patterns[(length, open_ends)]} -> {value}")
+    if not is_monotone(tuned):
+        parser.error("fitted weights score an open or longer run below a closed or shorter one; not written")
+    save_weights(args.output, tuned, args.win_length, scale=scale, error=error, positions=len(results))
+    print(f"wrote {args.output}")
+
+    if args.compare:
+        score = compare(args.output, args.compare, args.compare_depth, args.workers, args.size, args.win_length)
+        print(f"tuned weights scored {score:.1%} in {args.compare} games at depth {args.compare_depth}")
+
+if __name__ == "__main__":
+    main()
@@ -2,12 +2,12 @@
 def horizontal_label(index):
     return chr(ord('A') + index)
 
-# converts string to tuple for board indexing
-def coordinate_to_tuple(coord):
+# converts string to tuple for board indexing on a size x size board
+def coordinate_to_tuple(coord, size=19):
     try:
         row = ord(coord[0].upper()) - ord('A')
         col = int(coord[1:]) - 1
-        if 0 <= row < 19 and 0 <= col < 19:
+        if 0 <= row < size and 0 <= col < size:
             return row, col
     except:
         return None